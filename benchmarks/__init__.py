@@ -0,0 +1,4 @@
+"""Benchmarks for the ARPANSA UV integration.
+
+Run from the repository root, e.g. ``python -m benchmarks.parse``.
+"""
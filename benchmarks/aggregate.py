@@ -0,0 +1,67 @@
+"""Compare region aggregates from the snapshot's columns against a walk per sensor.
+
+    python -m benchmarks.aggregate [scale ...]
+
+The per-sensor walk is what each aggregate sensor would do on its own,
+reading every measurement once per sensor. Its cost per location grows with
+the number of sensors, while the columnar aggregates cost the same per
+location however many sensors read them.
+"""
+from __future__ import annotations
+
+import sys
+
+from custom_components.arpansa_uv.aggregate import CATEGORIES, Aggregator
+from custom_components.arpansa_uv.pyarpansa import MeasurementParser, Snapshot, Status
+
+from .common import load_feed, measure
+
+SENSORS_PER_REGION = 2 + len(CATEGORIES)
+
+
+def walk_per_sensor(snapshot: Snapshot, regions: dict) -> None:
+    """Work out each sensor's value by walking the measurements for it."""
+    for members in regions.values():
+        for _ in range(SENSORS_PER_REGION):
+            values = [
+                m.index
+                for m in snapshot
+                if m.status is Status.OK
+                and m.index is not None
+                and (members is None or m.friendlyname in members)
+            ]
+            max(values, default=None)
+
+
+def columnar(snapshot: Snapshot, aggregator: Aggregator) -> None:
+    """Work out every region's aggregates once from fresh columns."""
+    snapshot._columns = None
+    aggregator.aggregate(snapshot)
+
+
+def main(scales: list[int]) -> None:
+    """Run the benchmark for each feed scale."""
+    print("Aggregates for every region, per location in the feed")
+    for scale in scales:
+        parser = MeasurementParser()
+        snapshot = Snapshot(parser.feed(load_feed(scale)) + parser.close())
+        names = snapshot.getAllLocations()
+        regions = {
+            "All Locations": None,
+            "Half": frozenset(names[::2]),
+            "Quarter": frozenset(names[::4]),
+        }
+        aggregator = Aggregator(regions)
+        aggregator.aggregate(snapshot)
+        walk, _ = measure(walk_per_sensor, snapshot, regions, repeat=5)
+        cols, peak = measure(columnar, snapshot, aggregator)
+        print(
+            f"  {len(names):>6} locations"
+            f"  walk per sensor {walk / len(names) * 1e6:8.3f} µs"
+            f"  columnar {cols / len(names) * 1e6:8.3f} µs"
+            f"  ({peak / 1024:.1f} KiB)"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000])
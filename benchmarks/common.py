@@ -0,0 +1,52 @@
+"""Shared helpers for the benchmark scripts."""
+from __future__ import annotations
+
+from pathlib import Path
+import re
+import time
+import tracemalloc
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+FEED = FIXTURES / "uvvalues.xml"
+
+_LOCATION = re.compile(rb"<location .*?</location>\n?", re.S)
+
+
+def load_feed(scale: int = 1) -> bytes:
+    """Return the recorded feed, with its locations repeated scale times.
+
+    Repeated locations are given unique ids so that lookups stay meaningful.
+    """
+    feed = FEED.read_bytes()
+    if scale == 1:
+        return feed
+    locations = _LOCATION.findall(feed)
+    scaled = [
+        location.replace(b'id="', f'id="{n}-'.encode(), 1)
+        for n in range(scale)
+        for location in locations
+    ]
+    head = feed[: feed.index(locations[0])]
+    tail = feed[feed.rindex(locations[-1]) + len(locations[-1]) :]
+    return head + b"".join(scaled) + tail
+
+
+def measure(func, *args, repeat: int = 20) -> tuple[float, int]:
+    """Return the best wall time (seconds) and peak traced memory (bytes)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def report(title: str, rows: list[tuple[str, float, int]]) -> None:
+    """Print benchmark rows as a small table."""
+    print(title)
+    for name, elapsed, peak in rows:
+        print(f"  {name:<24} {elapsed * 1000:10.3f} ms {peak / 1024:10.1f} KiB")
@@ -0,0 +1,39 @@
+"""Compare parsing every location against parsing only the selected ones.
+
+    python -m benchmarks.filter [scale ...]
+"""
+from __future__ import annotations
+
+import sys
+
+from custom_components.arpansa_uv.pyarpansa import CHUNK_SIZE, Snapshot, parseDocument
+
+from .common import load_feed, measure, report
+
+SELECTED = [1, 4, 17]
+
+
+def update(chunks: list, locations: set | None) -> Snapshot:
+    """Parse the feed into a Snapshot, as a poll for new data does."""
+    measurements, skipped = parseDocument(chunks, locations=locations)
+    return Snapshot(measurements, skipped=skipped)
+
+
+def main(scales: list[int]) -> None:
+    """Run the benchmark for each feed scale."""
+    for scale in scales:
+        feed = load_feed(scale)
+        chunks = [feed[offset : offset + CHUNK_SIZE] for offset in range(0, len(feed), CHUNK_SIZE)]
+        names = update(chunks, None).getAllLocations()
+        report(
+            f"{len(names)} locations, {len(feed)} bytes",
+            [("all", *measure(update, chunks, None))]
+            + [
+                (f"{count} selected", *measure(update, chunks, set(names[:count])))
+                for count in SELECTED
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100])
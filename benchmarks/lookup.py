@@ -0,0 +1,46 @@
+"""Compare location lookups on a Snapshot against the previous bs4 tree search.
+
+    python -m benchmarks.lookup [scale ...]
+"""
+from __future__ import annotations
+
+import sys
+
+from bs4 import BeautifulSoup
+
+from custom_components.arpansa_uv.pyarpansa import MeasurementParser, Snapshot
+
+from .common import load_feed, measure, report
+
+
+def lookup_bs4(soup: BeautifulSoup, names: list[str]) -> None:
+    """Look up every location the way getLatest used to."""
+    for name in names:
+        location = soup.find("location", {"id": name})
+        {state.name: state.text for state in location if state.name is not None}
+
+
+def lookup_snapshot(snapshot: Snapshot, names: list[str]) -> None:
+    """Look up every location in the snapshot index."""
+    for name in names:
+        snapshot.getLatest(name)
+
+
+def main(scales: list[int]) -> None:
+    """Run the benchmark for each feed scale."""
+    for scale in scales:
+        feed = load_feed(scale)
+        parser = MeasurementParser()
+        snapshot = Snapshot(parser.feed(feed) + parser.close())
+        names = snapshot.getAllLocations()
+        report(
+            f"getLatest for each of {len(names)} locations",
+            [
+                ("bs4", *measure(lookup_bs4, BeautifulSoup(feed, "xml"), names, repeat=3)),
+                ("snapshot", *measure(lookup_snapshot, snapshot, names)),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10])
@@ -0,0 +1,53 @@
+"""Compare the streaming parser backends against the previous BeautifulSoup path.
+
+    python -m benchmarks.parse [scale ...]
+"""
+from __future__ import annotations
+
+import sys
+
+from bs4 import BeautifulSoup
+
+from custom_components.arpansa_uv.pyarpansa import CHUNK_SIZE, PARSERS, parseMeasurements
+
+from .common import load_feed, measure, report
+
+
+def parse_bs4(feed: bytes) -> list:
+    """Parse the feed the way fetchLatestMeasurements used to."""
+    soup = BeautifulSoup(feed, "xml")
+    measurements = []
+    for location in soup.find_all("location"):
+        extracted = {
+            state.name: state.text for state in location if state.name is not None
+        }
+        extracted["friendlyname"] = location.get("id")
+        measurements.append(extracted)
+    return measurements
+
+
+def parse_stream(feed: bytes, backend: str) -> list:
+    """Parse the feed in network sized chunks with the given backend."""
+    return parseMeasurements(
+        (feed[offset : offset + CHUNK_SIZE] for offset in range(0, len(feed), CHUNK_SIZE)),
+        backend,
+    )
+
+
+def main(scales: list[int]) -> None:
+    """Run the benchmark for each feed scale."""
+    for scale in scales:
+        feed = load_feed(scale)
+        locations = len(parse_bs4(feed))
+        report(
+            f"{locations} locations, {len(feed)} bytes",
+            [("bs4", *measure(parse_bs4, feed))]
+            + [
+                (backend, *measure(parse_stream, feed, backend))
+                for backend in PARSERS
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100])
@@ -0,0 +1,63 @@
+"""Compare entry startup from the saved snapshot against fetching the feed.
+
+Setup used to wait for a fetch from ARPANSA before any sensor could be
+added; with a saved snapshot it only has to load and rebuild it. The feed is
+served locally with a simulated network latency.
+
+    python -m benchmarks.startup [latency_seconds]
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.arpansa_uv.pyarpansa import Arpansa, Snapshot
+
+from .common import load_feed
+
+RUNS = 10
+
+
+async def main(latency: float) -> None:
+    """Run the benchmark against a local server."""
+    feed = load_feed()
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        return web.Response(body=feed, content_type="application/xml")
+
+    app = web.Application()
+    app.router.add_get("/uvvalues.xml", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}/uvvalues.xml"
+
+    async with aiohttp.ClientSession() as session:
+        cold = float("inf")
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            snapshot = await Arpansa(session, url=url).fetchLatestMeasurements()
+            cold = min(cold, time.perf_counter() - start)
+    await runner.cleanup()
+
+    stored = json.dumps({"snapshot": snapshot.toCompact()})
+    warm = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        Snapshot.fromCompact(json.loads(stored)["snapshot"], stale=True)
+        warm = min(warm, time.perf_counter() - start)
+
+    print(f"Startup with {latency * 1000:.0f} ms simulated latency")
+    print(f"  {'without cache':<24} {cold * 1000:10.3f} ms")
+    print(f"  {'with cache':<24} {warm * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.3))
@@ -3,46 +3,108 @@ from __future__ import annotations
 
 from datetime import timedelta
 import logging
-import async_timeout
 import asyncio
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.core import Config, HomeAssistant
+from homeassistant.core import Config, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
 
 from custom_components.arpansa_uv.pyarpansa import Arpansa, ApiError
 
 from .const import (
+    CONF_CACHE_TTL,
+    CONF_CUSTOM_REGIONS,
+    CONF_LOCATIONS,
+    CONF_MIRRORS,
+    CONF_POLL_INTERVAL,
+    CONF_RECORD_SAMPLES,
+    CONF_REGIONS,
     DOMAIN,
     PLATFORMS,
+    DEFAULT_CACHE_TTL,
     DEFAULT_SCAN_INTERVAL,
+    REGIONS,
     STARTUP_MESSAGE
 )
+from .aggregate import Aggregator, parse_regions
+from .pyarpansa.metrics import Histogram
+from .hub import ArpansaFeedHub, async_get_hub
+from .scheduler import AdaptiveScheduler
 
 SCAN_INTERVAL = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
 
+# Options that can be changed on a running entry without setting it up again.
+RECONCILED_OPTIONS = {CONF_LOCATIONS, CONF_POLL_INTERVAL, CONF_CACHE_TTL, CONF_MIRRORS}
+
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 async def async_setup(hass: HomeAssistant, config: Config):
     """Set up this integration using YAML is not supported."""
     return True
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry from an earlier version.
+
+    Version 1 entries' sensors had unique IDs that weren't per entry, so
+    two entries with a location in common collided. Their unique IDs are
+    given the entry's ID, keeping their entity IDs and history.
+    """
+    if entry.version == 1:
+        prefix = f"arpansa_uv_{entry.entry_id}_"
+
+        @callback
+        def migrate_unique_id(entity_entry: er.RegistryEntry) -> dict | None:
+            if entity_entry.unique_id.startswith(prefix):
+                return None
+            return {"new_unique_id": prefix + entity_entry.unique_id.removeprefix("arpansa_uv_")}
+
+        await er.async_migrate_entries(hass, entry.entry_id, migrate_unique_id)
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.debug(f"Migrated entry {entry.entry_id} to version 2")
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})
         _LOGGER.info(STARTUP_MESSAGE)
 
-    session = async_get_clientsession(hass)
-    client = Arpansa(session)
+    hub = async_get_hub(hass)
+    interval = entry.options.get(
+        CONF_POLL_INTERVAL, entry.data.get(CONF_POLL_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    )
+    settings = _settings(entry)
+    # The entry's own regions are added to the chosen ones, replacing any
+    # with the same name.
+    regions = {
+        region: REGIONS[region] for region in settings.get(CONF_REGIONS, []) if region in REGIONS
+    }
+    regions.update(parse_regions(settings.get(CONF_CUSTOM_REGIONS, "")))
+    coordinator = ArpansaDataUpdateCoordinator(
+        hass,
+        hub=hub,
+        interval=timedelta(minutes=interval),
+        regions=regions,
+    )
+    coordinator.settings = settings
+    hub.async_register(coordinator)
 
-    coordinator = ArpansaDataUpdateCoordinator(hass, client=client)
-    await coordinator.async_refresh()
+    # Start from the last saved values if there are any and refresh in the
+    # background, rather than holding up startup on ARPANSA.
+    snapshot = await hub.async_load()
+    if snapshot is not None:
+        coordinator.async_set_updated_data(snapshot)
+        hass.async_create_task(coordinator.async_refresh())
+    else:
+        await coordinator.async_refresh()
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+        if not coordinator.last_update_success:
+            hub.async_unregister(coordinator)
+            raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
@@ -60,24 +122,136 @@ class ArpansaDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
     def __init__(
-        self, hass: HomeAssistant, client: Arpansa
+        self,
+        hass: HomeAssistant,
+        hub: ArpansaFeedHub,
+        interval: timedelta = SCAN_INTERVAL,
+        regions: dict | None = None,
     ) -> None:
         """Initialize."""
-        self.api = client
+        self.hub = hub
+        self.api = hub.api
         self.platforms = []
+        self.scheduler = AdaptiveScheduler(interval)
+        self.aggregator = Aggregator(regions) if regions else None
+        self.aggregates = {}
+        self.suppressed = 0
+        self.locations: set | None = None
+        self.stations: dict[str, set] = {}
+        self.location_sensors = None
+        self.settings = {}
+        self.update_times = Histogram(low=0.00001, high=1.0)
+        self._notified = None
+        self._notified_success = None
+        self._requests = self.api.stats["requests"]
+
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=interval)
+
+    @property
+    def wanted_locations(self) -> set | None:
+        """Return the locations this entry needs measurements for, or None for all.
+
+        That's every location until the sensor platform has set locations,
+        then those, the stations interpolated sensors use and the members of
+        the entry's regions.
+        """
+        if self.locations is None:
+            return None
+        wanted = set(self.locations)
+        for stations in self.stations.values():
+            wanted |= stations
+        if self.aggregator is not None:
+            for members in self.aggregator.regions.values():
+                if members is None:
+                    return None
+                wanted.update(members)
+        return wanted
+
+    @property
+    def record_samples(self) -> bool:
+        """Return True if this entry's sensors have a state class."""
+        return self.settings.get(CONF_RECORD_SAMPLES, True)
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+    @property
+    def mirrors(self) -> list:
+        """Return the URLs of the mirrors this entry lists."""
+        value = self.settings.get(CONF_MIRRORS, "")
+        return [url.strip() for url in value.split(",") if url.strip()]
+
+    @property
+    def cache_ttl(self) -> timedelta:
+        """Return how long this entry lets flows reuse a snapshot."""
+        return timedelta(seconds=self.settings.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL))
+
+    @callback
+    def async_set_updated_data(self, data) -> None:
+        """Accept a snapshot fetched on behalf of another entry."""
+        self.update_interval = self.scheduler.next_interval(data, dt_util.utcnow())
+        super().async_set_updated_data(data)
+
+    @callback
+    def async_set_interval(self, interval: timedelta) -> None:
+        """Change the configured interval and reschedule the next poll to suit."""
+        self.scheduler.interval = interval
+        self.update_interval = self.scheduler.next_interval(self.data, dt_util.utcnow())
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Work out the region aggregates once, then update changed entities.
+
+        Entities listening with a location as their context are only told
+        about an update if that location's measurement changed since the last
+        snapshot they were told about, or the snapshot became (or stopped
+        being) stale, or the coordinator's success changed. Skipped
+        notifications are counted in suppressed, and the time taken is
+        recorded in update_times.
+        """
+        start = time.perf_counter()
+        if self.aggregator is not None and self.data is not None:
+            self.aggregates = self.aggregator.aggregate(self.data)
+
+        previous, self._notified = self._notified, self.data
+        success, self._notified_success = self._notified_success, self.last_update_success
+        if (
+            previous is None
+            or self.data is None
+            or success != self.last_update_success
+            or previous.stale != self.data.stale
+        ):
+            changed = None
+        else:
+            changed = self.data.diff(previous)
+
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or context in changed:
+                update_callback()
+            else:
+                self.suppressed += 1
+        self.update_times.record(time.perf_counter() - start)
 
     async def _async_update_data(self):
         """Update data via library."""
         try:
-            # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-            # handled by the data update coordinator.
-            async with async_timeout.timeout(10):
-                await self.api.fetchLatestMeasurements()
-                return self.api
+            # Note: timeouts, retries and backing off from an unavailable
+            # server are handled by the client. Another entry's fetch within
+            # the last half interval is fresh enough; the hub will already
+            # have pushed it to us.
+            snapshot = await self.hub.async_get_snapshot(self.scheduler.interval / 2, self)
         except ApiError as err:
+            self.update_interval = self.scheduler.interval
             raise UpdateFailed from err
+        else:
+            if snapshot.stale:
+                _LOGGER.warning("ARPANSA is unavailable, using the last values received")
+            self.update_interval = self.scheduler.next_interval(snapshot, dt_util.utcnow())
+            _LOGGER.debug(f"Next ARPANSA poll in {self.update_interval}")
+            return snapshot
+        finally:
+            requests = self.api.stats["requests"]
+            _LOGGER.debug(f"Made {requests - self._requests} request(s) to ARPANSA this interval")
+            self._requests = requests
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
@@ -93,12 +267,48 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.hub.async_unregister(coordinator)
 
     return unloaded    
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    locations = entry.data.get("locations")
-    _LOGGER.debug(f"Reloading config with options {locations}")
-    await async_setup_entry(hass, entry)
\ No newline at end of file
+    """Apply changed options to a config entry.
+
+    Changes to the locations, poll interval, cache lifetime and mirrors are
+    applied in place: the coordinator and its snapshot are kept, only the
+    sensors of added or removed locations are touched, and nothing is
+    downloaded.
+    Any other change sets the entry up again.
+    """
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    settings = _settings(entry)
+    previous = coordinator.settings if coordinator is not None else {}
+    changed = {
+        key
+        for key in settings.keys() | previous.keys()
+        if settings.get(key) != previous.get(key)
+    }
+    if coordinator is None or (changed and (
+        changed - RECONCILED_OPTIONS or coordinator.location_sensors is None
+    )):
+        _LOGGER.debug(f"Reloading config with changed options {changed}")
+        if coordinator is not None:
+            await async_unload_entry(hass, entry)
+        await async_setup_entry(hass, entry)
+        return
+
+    _LOGGER.debug(f"Applying changed options {changed} in place")
+    coordinator.settings = settings
+    if CONF_MIRRORS in changed:
+        coordinator.hub.async_apply_mirrors()
+    if CONF_POLL_INTERVAL in changed:
+        coordinator.async_set_interval(
+            timedelta(minutes=settings.get(CONF_POLL_INTERVAL, DEFAULT_SCAN_INTERVAL))
+        )
+    if CONF_LOCATIONS in changed:
+        await coordinator.location_sensors.async_update()
+
+
+def _settings(entry: ConfigEntry) -> dict:
+    """Return the entry's settings, with its options taking precedence."""
+    return {**entry.data, **entry.options}
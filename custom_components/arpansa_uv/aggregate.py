@@ -0,0 +1,88 @@
+"""UV index aggregates across groups of locations."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from itertools import compress
+import math
+from typing import NamedTuple
+
+from .pyarpansa import Snapshot
+
+# WHO UV index categories counted by the aggregates, with their lower bounds.
+CATEGORIES = {
+    "moderate": 3.0,
+    "high": 6.0,
+    "very_high": 8.0,
+    "extreme": 11.0,
+}
+
+
+class RegionAggregate(NamedTuple):
+    """Aggregates of the UV index across a region's locations."""
+    count: int
+    max: float | None
+    mean: float | None
+    above: dict
+
+
+class Aggregator:
+    """Compute aggregates for groups of locations from a Snapshot's columns.
+
+    Each region's selection mask over the columns is worked out once and
+    reused for as long as the feed lists the same locations, so an update
+    costs a handful of C-level passes over an array per region rather than
+    a walk over every location's measurement.
+    """
+
+    def __init__(self, regions: dict) -> None:
+        """Initialize with region name to member locations, or None for all."""
+        self.regions = regions
+        self._names = None
+        self._masks = {}
+
+    def aggregate(self, snapshot: Snapshot) -> dict:
+        """Return a RegionAggregate for each region."""
+        names, values = snapshot.columns()
+        if names != self._names:
+            self._names = names
+            self._masks = {
+                region: None if members is None else [name in members for name in names]
+                for region, members in self.regions.items()
+            }
+        results = {}
+        for region, mask in self._masks.items():
+            selected = values if mask is None else array("d", compress(values, mask))
+            results[region] = summarise(selected)
+        return results
+
+
+def parse_regions(value: str) -> dict:
+    """Parse regions given as "Name: Location, Location; Name: Location".
+
+    Returns region name to member locations. Groups without a name or any
+    members are left out.
+    """
+    regions = {}
+    for group in value.split(";"):
+        name, _, members = group.partition(":")
+        members = tuple(member.strip() for member in members.split(",") if member.strip())
+        if name.strip() and members:
+            regions[name.strip()] = members
+    return regions
+
+
+def summarise(values: array) -> RegionAggregate:
+    """Return the aggregates of an array of UV index values."""
+    if not values:
+        return RegionAggregate(0, None, None, dict.fromkeys(CATEGORIES, 0))
+    ordered = sorted(values)
+    return RegionAggregate(
+        count=len(ordered),
+        max=ordered[-1],
+        mean=math.fsum(ordered) / len(ordered),
+        above={
+            category: len(ordered) - bisect_left(ordered, bound)
+            for category, bound in CATEGORIES.items()
+        },
+    )
@@ -4,24 +4,37 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from .pyarpansa import Arpansa, ApiError
+from .dose import MED
+from .hub import async_get_hub
+from .pyarpansa import ApiError
 
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    CONF_CACHE_TTL,
+    CONF_CUSTOM_REGIONS,
     CONF_LOCATIONS,
+    CONF_MIRRORS,
     CONF_NAME,
+    CONF_NEAREST,
     CONF_POLL_INTERVAL,
+    CONF_RECORD_SAMPLES,
+    CONF_REGIONS,
+    CONF_SKIN_TYPE,
+    CONF_TRACKED,
     DOMAIN,
+    DEFAULT_CACHE_TTL,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_NAME,
+    DEFAULT_SKIN_TYPE,
+    REGIONS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,26 +52,47 @@ async def build_schema(
     :param step: for which step we should build schema
     :return: Configuration schema with default parameters
     """ 
-    session = async_get_clientsession(hass)
-    arpansa = Arpansa(session)
     try:
-        await arpansa.fetchLatestMeasurements()
+        snapshot = await async_get_hub(hass).async_get_flow_snapshot()
     except ApiError as err:
         raise CantConnect from err
-    locations = arpansa.getAllLocations()
+    locations = snapshot.getAllLocations()
+    trackable = sorted(
+        state.entity_id
+        for state in hass.states.async_all(("zone", "device_tracker"))
+        if ATTR_LATITUDE in state.attributes and ATTR_LONGITUDE in state.attributes
+    )
+    advanced = {}
+    if show_advanced:
+        advanced[vol.Optional(CONF_CACHE_TTL, default=DEFAULT_CACHE_TTL)] = cv.positive_int
+        advanced[vol.Optional(CONF_MIRRORS, default="")] = cv.string
     if step == "config_user":
         return vol.Schema(
             {   
                 vol.Required(CONF_NAME,default=DEFAULT_NAME): cv.string,
                 vol.Optional(CONF_LOCATIONS): cv.multi_select(locations),
-                vol.Optional(CONF_POLL_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.positive_int
+                vol.Optional(CONF_NEAREST, default=False): cv.boolean,
+                vol.Optional(CONF_TRACKED, default=[]): cv.multi_select(trackable),
+                vol.Optional(CONF_POLL_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.positive_int,
+                vol.Optional(CONF_SKIN_TYPE, default=DEFAULT_SKIN_TYPE): vol.In(sorted(MED)),
+                vol.Optional(CONF_REGIONS, default=[]): cv.multi_select(list(REGIONS)),
+                vol.Optional(CONF_CUSTOM_REGIONS, default=""): cv.string,
+                vol.Optional(CONF_RECORD_SAMPLES, default=True): cv.boolean,
+                **advanced,
             }
         )
     if step == "options_user":
         return vol.Schema(
             {   
                 vol.Optional(CONF_LOCATIONS): cv.multi_select(locations),
-                vol.Optional(CONF_POLL_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.positive_int
+                vol.Optional(CONF_NEAREST, default=False): cv.boolean,
+                vol.Optional(CONF_TRACKED, default=[]): cv.multi_select(trackable),
+                vol.Optional(CONF_POLL_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.positive_int,
+                vol.Optional(CONF_SKIN_TYPE, default=DEFAULT_SKIN_TYPE): vol.In(sorted(MED)),
+                vol.Optional(CONF_REGIONS, default=[]): cv.multi_select(list(REGIONS)),
+                vol.Optional(CONF_CUSTOM_REGIONS, default=""): cv.string,
+                vol.Optional(CONF_RECORD_SAMPLES, default=True): cv.boolean,
+                **advanced,
             }
         )
     if step == None:
@@ -77,7 +111,7 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any], step_id: str
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for ARPANSA UV Values."""
 
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
     def __init__(self):
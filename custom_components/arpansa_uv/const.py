@@ -1,11 +1,14 @@
+from .pyarpansa import ARPANSA_URL  # noqa: F401
+
 NAME = "ARPANSA UV"
 DOMAIN = "arpansa_uv"
 VERSION = "0.0.1"
 ATTRIBUTION = "UV observations courtesy of ARPANSA"
-ARPANSA_URL = "https://uvdata.arpansa.gov.au/xml/uvvalues.xml"
 ISSUE_URL = "https://github.com/joshuar/ha_arpansa_uv/issues"
 
 DEFAULT_SCAN_INTERVAL = 1
+DEFAULT_CACHE_TTL = 300
+DEFAULT_SKIN_TYPE = 2
 DEFAULT_NAME = NAME
 
 SENSOR = "sensor"
@@ -15,6 +18,33 @@ CONF_NAME = "name"
 CONF_API = "arpansa"
 CONF_LOCATIONS = "locations"
 CONF_POLL_INTERVAL = "poll_interval"
+CONF_CACHE_TTL = "cache_ttl"
+CONF_MIRRORS = "mirrors"
+CONF_SKIN_TYPE = "skin_type"
+CONF_REGIONS = "regions"
+CONF_CUSTOM_REGIONS = "custom_regions"
+CONF_NEAREST = "nearest"
+CONF_TRACKED = "tracked"
+CONF_RECORD_SAMPLES = "record_samples"
+
+DATA_HUB = "hub"
+
+# Groups of ARPANSA locations that aggregate sensors can be created for.
+# None stands for every location in the feed.
+REGIONS = {
+    "All Locations": None,
+    "Australia": (
+        "Adelaide", "Alice Springs", "Brisbane", "Canberra", "Darwin", "Emerald",
+        "Gold Coast", "Kingston", "Melbourne", "Newcastle", "Perth", "Sydney",
+        "Townsville",
+    ),
+    "Queensland": ("Brisbane", "Emerald", "Gold Coast", "Townsville"),
+    "New South Wales and ACT": ("Canberra", "Newcastle", "Sydney"),
+    "Victoria and Tasmania": ("Kingston", "Melbourne"),
+    "Northern Territory": ("Alice Springs", "Darwin"),
+    "South and Western Australia": ("Adelaide", "Perth"),
+    "Antarctic and Sub-Antarctic": ("Casey", "Davis", "Macquarie Island", "Mawson"),
+}
 
 STARTUP_MESSAGE = f"""
 -------------------------------------------------------------------
@@ -0,0 +1,56 @@
+"""Diagnostics support for ARPANSA UV."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_MIRRORS, DOMAIN
+
+# Mirrors may be private hosts, or carry credentials in their URLs.
+TO_REDACT = {CONF_MIRRORS, "url"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+    api = coordinator.api
+    snapshot = coordinator.data
+    age = hub.age
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "cadence": str(coordinator.scheduler.cadence),
+            "suppressed_writes": coordinator.suppressed,
+            "update_seconds": coordinator.update_times.summary(),
+        },
+        "snapshot": {
+            "locations": len(snapshot) if snapshot is not None else 0,
+            "stale": snapshot.stale if snapshot is not None else None,
+            "quarantined": sorted(snapshot.quarantined) if snapshot is not None else [],
+            "age_seconds": age.total_seconds() if age is not None else None,
+        },
+        "cache": {**hub.stats, "hit_rate": api.cacheHitRate},
+        "client": {
+            "stats": dict(api.stats),
+            "circuit_breaker": api.breaker.state,
+            "fetch_seconds": api.latencies.summary(),
+            "parse_seconds": api.parseTimes.summary(),
+            "payload_bytes": api.payloadSizes.summary(),
+            "http_statuses": list(api.statuses),
+            "endpoints": async_redact_data(
+                [endpoint.summary() for endpoint in api.rankedEndpoints()], TO_REDACT
+            ),
+        },
+    }
+
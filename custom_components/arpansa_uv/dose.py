@@ -0,0 +1,101 @@
+"""Erythemal UV dose accumulated per location."""
+from __future__ import annotations
+
+from datetime import date
+
+from .history import MAX_GAP
+from .pyarpansa import Measurement, Snapshot, Status
+
+# A UV index of 1 is 25 mW/m² of erythemally weighted irradiance, and a
+# standard erythemal dose (SED) is 100 J/m², so each hour at UV 1 is 0.9 SED.
+SED_PER_INDEX_HOUR = 0.025 * 3600 / 100
+
+# Minimal erythemal dose in SED for each Fitzpatrick skin type.
+MED = {1: 2.0, 2: 2.5, 3: 3.0, 4: 4.5, 5: 6.0, 6: 10.0}
+
+
+class DoseAccumulator:
+    """Integrate a location's UV index into the dose received today.
+
+    Successive samples are integrated with the trapezoidal rule, so only the
+    last sample needs to be kept. Gaps longer than MAX_GAP are skipped rather
+    than guessed at, and the dose resets at the location's local midnight.
+    """
+
+    __slots__ = ("day", "dose", "last_time", "last_index")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.day: date | None = None
+        self.dose = 0.0
+        self.last_time: float | None = None
+        self.last_index: float | None = None
+
+    def add(self, measurement: Measurement) -> bool:
+        """Add a measurement, returning False if it isn't a new sample."""
+        if (
+            measurement.status is not Status.OK
+            or measurement.index is None
+            or measurement.utcdatetime is None
+            or measurement.localdatetime is None
+        ):
+            return False
+        timestamp = measurement.utcdatetime.timestamp()
+        if self.last_time is not None and timestamp <= self.last_time:
+            return False
+
+        day = measurement.localdatetime.date()
+        if day != self.day:
+            self.day = day
+            self.dose = 0.0
+        elif timestamp - self.last_time <= MAX_GAP.total_seconds():
+            hours = (timestamp - self.last_time) / 3600
+            self.dose += (self.last_index + measurement.index) / 2 * hours * SED_PER_INDEX_HOUR
+        self.last_time = timestamp
+        self.last_index = measurement.index
+        return True
+
+    def toCompact(self) -> list:
+        """Return the accumulator's state as a JSON-friendly list."""
+        return [self.day.isoformat() if self.day else None, self.dose, self.last_time, self.last_index]
+
+    @classmethod
+    def fromCompact(cls, data: list) -> DoseAccumulator:
+        """Rebuild an accumulator from the output of toCompact."""
+        accumulator = cls()
+        day, accumulator.dose, accumulator.last_time, accumulator.last_index = data
+        accumulator.day = date.fromisoformat(day) if day else None
+        return accumulator
+
+
+class Doses(dict):
+    """DoseAccumulator for each location, keyed by location id."""
+
+    def add(self, snapshot: Snapshot) -> list:
+        """Add a snapshot's measurements, returning the locations that changed."""
+        changed = []
+        for measurement in snapshot:
+            accumulator = self.get(measurement.friendlyname)
+            if accumulator is None:
+                accumulator = self[measurement.friendlyname] = DoseAccumulator()
+            if accumulator.add(measurement):
+                changed.append(measurement.friendlyname)
+        return changed
+
+    def toCompact(self) -> dict:
+        """Return every accumulator's state for saving."""
+        return {name: accumulator.toCompact() for name, accumulator in self.items()}
+
+    @classmethod
+    def fromCompact(cls, data: dict) -> Doses:
+        """Rebuild the accumulators from the output of toCompact."""
+        return cls(
+            (name, DoseAccumulator.fromCompact(state)) for name, state in data.items()
+        )
+
+
+def time_to_burn(index: float | None, skin_type: int) -> float | None:
+    """Return the minutes until skin of the given type burns at this index."""
+    if not index:
+        return None
+    return MED[skin_type] / (index * SED_PER_INDEX_HOUR) * 60
@@ -0,0 +1,139 @@
+"""Recent UV index history and daily aggregates per location."""
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime, timedelta
+
+from .pyarpansa import Measurement, Snapshot, Status
+
+HISTORY_SIZE = 24 * 60
+MEAN_WINDOW = timedelta(minutes=15)
+MAX_GAP = timedelta(minutes=15)
+THRESHOLD = 3.0
+
+
+class LocationHistory:
+    """A fixed-size ring buffer of (timestamp, index) samples for a location.
+
+    Daily aggregates (peak, time of peak and minutes at or above THRESHOLD)
+    and a rolling mean over MEAN_WINDOW are kept up to date as each sample
+    is added, so reading them never means scanning the buffer. The day
+    rolls over with the location's own local date.
+    """
+
+    __slots__ = (
+        "size",
+        "day",
+        "peak",
+        "peak_time",
+        "minutes_above",
+        "_times",
+        "_values",
+        "_next",
+        "_window_start",
+        "_window_sum",
+    )
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialize."""
+        self.size = size
+        self.day: date | None = None
+        self.peak: float | None = None
+        self.peak_time: datetime | None = None
+        self.minutes_above = 0.0
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._next = 0
+        self._window_start = 0
+        self._window_sum = 0.0
+
+    def __len__(self) -> int:
+        return min(self._next, self.size)
+
+    @property
+    def version(self) -> int:
+        """Return the number of samples ever added."""
+        return self._next
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean index over the last MEAN_WINDOW."""
+        count = self._next - self._window_start
+        if not count:
+            return None
+        return self._window_sum / count
+
+    @property
+    def latest(self) -> tuple[float, float] | None:
+        """Return the most recent (timestamp, index) sample."""
+        if not self._next:
+            return None
+        slot = (self._next - 1) % self.size
+        return self._times[slot], self._values[slot]
+
+    def samples(self):
+        """Yield the buffered (timestamp, index) samples, oldest first."""
+        for seq in range(max(0, self._next - self.size), self._next):
+            slot = seq % self.size
+            yield self._times[slot], self._values[slot]
+
+    def add(self, measurement: Measurement) -> bool:
+        """Add a measurement, returning False if it isn't a new sample."""
+        if (
+            measurement.status is not Status.OK
+            or measurement.index is None
+            or measurement.utcdatetime is None
+            or measurement.localdatetime is None
+        ):
+            return False
+        timestamp = measurement.utcdatetime.timestamp()
+        value = measurement.index
+        latest = self.latest
+        if latest is not None and timestamp <= latest[0]:
+            return False
+
+        day = measurement.localdatetime.date()
+        if day != self.day:
+            self.day = day
+            self.peak = None
+            self.peak_time = None
+            self.minutes_above = 0.0
+        elif latest is not None:
+            gap = timestamp - latest[0]
+            if latest[1] >= THRESHOLD and gap <= MAX_GAP.total_seconds():
+                self.minutes_above += gap / 60
+        if self.peak is None or value > self.peak:
+            self.peak = value
+            self.peak_time = measurement.utcdatetime
+
+        # The oldest sample is about to be overwritten; drop it from the
+        # rolling window first if it is still in it.
+        if self._window_start == self._next - self.size:
+            self._window_sum -= self._values[self._window_start % self.size]
+            self._window_start += 1
+        slot = self._next % self.size
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self._next += 1
+        self._window_sum += value
+        cutoff = timestamp - MEAN_WINDOW.total_seconds()
+        while self._times[self._window_start % self.size] <= cutoff:
+            self._window_sum -= self._values[self._window_start % self.size]
+            self._window_start += 1
+        return True
+
+
+class History(dict):
+    """LocationHistory for each location, keyed by location id."""
+
+    def add(self, snapshot: Snapshot) -> list:
+        """Add a snapshot's measurements, returning the locations that changed."""
+        changed = []
+        for measurement in snapshot:
+            history = self.get(measurement.friendlyname)
+            if history is None:
+                history = self[measurement.friendlyname] = LocationHistory()
+            if history.add(measurement):
+                changed.append(measurement.friendlyname)
+        return changed
+
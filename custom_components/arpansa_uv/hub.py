@@ -0,0 +1,281 @@
+"""Shared ARPANSA feed for all config entries."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_HUB, DEFAULT_CACHE_TTL, DOMAIN
+from .dose import Doses
+from .history import History
+from .pyarpansa import Arpansa, Snapshot
+from .stations import StationIndex
+from .statistics import HourlyStatistics, statistic_id
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.snapshot"
+SAVE_DELAY = 60
+
+
+class ArpansaFeedHub:
+    """Fetch the ARPANSA feed once and share it with every config entry.
+
+    Coordinators register with the hub and ask it for a snapshot no older
+    than their update interval. Whenever the hub does fetch, the new snapshot
+    is pushed to every other registered coordinator, which keeps their
+    timers aligned so the feed is downloaded once per interval in total.
+
+    The latest snapshot is also saved to disk, so that after a restart
+    entries can start from the last known values instead of waiting on
+    the network.
+
+    Only the locations some entry needs are parsed (see wanted_locations);
+    the rest are only listed, for config and options flows to offer. When an
+    entry needs more locations, the last document is parsed again for them.
+
+    Settings that belong to the client rather than to one entry are merged
+    across entries: observations may be fetched from any entry's mirrors,
+    and flows reuse a snapshot for the shortest cache lifetime any entry sets.
+
+    For locations whose sensors have no state class, and so get no
+    statistics from the recorder, the hourly mean, min and max UV index are
+    written to long-term statistics as external statistics once the hour is
+    over.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: Arpansa) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.api = client
+        self.snapshot: Snapshot | None = None
+        self.history = History()
+        self.doses = Doses()
+        self.statistics = HourlyStatistics()
+        self.stations = StationIndex()
+        self.stats = Counter()
+        self._fetched: datetime | None = None
+        self._lock = asyncio.Lock()
+        self._coordinators = {}
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._loaded = False
+
+    @property
+    def age(self) -> timedelta | None:
+        """Return how long ago the current snapshot was fetched."""
+        if self._fetched is None:
+            return None
+        return dt_util.utcnow() - self._fetched
+
+    async def async_load(self) -> Snapshot | None:
+        """Restore the last saved snapshot, marked stale, if there is one."""
+        async with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                data = await self._store.async_load()
+                if data is not None and self.snapshot is None:
+                    self.doses = Doses.fromCompact(data.get("doses", {}))
+                    self.statistics = HourlyStatistics.fromCompact(data.get("statistics", {}))
+                    self.snapshot = Snapshot.fromCompact(data["snapshot"], stale=True)
+                    self.history.add(self.snapshot)
+                    self.doses.add(self.snapshot)
+                    _LOGGER.debug(f"Restored {len(self.snapshot)} saved ARPANSA measurements")
+                # Catch up on anything buffered that statistics haven't seen,
+                # e.g. when the hub outlived a reload of every entry.
+                if self.statistics.backfill(self.history):
+                    self._async_write_statistics()
+        return self.snapshot
+
+    @callback
+    def async_register(self, coordinator) -> None:
+        """Start sharing snapshots with a coordinator."""
+        self._coordinators[coordinator] = None
+        self.async_apply_mirrors()
+
+    @callback
+    def async_unregister(self, coordinator) -> None:
+        """Stop sharing snapshots with a coordinator.
+
+        The hub itself is kept for as long as Home Assistant runs, even once
+        the last coordinator has gone, so that reloading every entry keeps
+        the history, the client's breaker and cache state, and any save
+        still pending.
+        """
+        self._coordinators.pop(coordinator, None)
+        self.async_apply_mirrors()
+
+    async def async_get_snapshot(
+        self, max_age: timedelta, requester=None
+    ) -> Snapshot:
+        """Return a snapshot no older than max_age, fetching one if needed."""
+        async with self._lock:
+            self.api.locations = self.wanted_locations
+            if self._fetched is not None and self.age < max_age:
+                self.stats["hits"] += 1
+                snapshot = await self._async_reparse()
+                if snapshot is None:
+                    return self.snapshot
+                self.snapshot = snapshot
+                self._async_share(snapshot, requester)
+                return snapshot
+            self.stats["misses"] += 1
+            snapshot = await self.api.fetchLatestMeasurements()
+            if snapshot is not self.snapshot and not snapshot.stale:
+                self.history.add(snapshot)
+                self.doses.add(snapshot)
+                if self.statistics.add(snapshot):
+                    self._async_write_statistics()
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+            self.snapshot = snapshot
+            self._fetched = dt_util.utcnow()
+        self._async_share(snapshot, requester)
+        return snapshot
+
+    async def async_refilter(self) -> None:
+        """Make sure the snapshot has every location an entry needs.
+
+        Nothing is fetched; the last document is parsed again if needed,
+        and the new snapshot shared with every coordinator.
+        """
+        async with self._lock:
+            self.api.locations = self.wanted_locations
+            snapshot = await self._async_reparse()
+            if snapshot is None:
+                return
+            self.snapshot = snapshot
+        self._async_share(snapshot)
+
+    async def _async_reparse(self) -> Snapshot | None:
+        """Return a snapshot parsed again for more locations, if one was needed."""
+        snapshot = await self.api.refilter()
+        if snapshot is None or snapshot is self.snapshot:
+            return None
+        _LOGGER.debug(f"Parsed ARPANSA data again for {len(snapshot)} location(s)")
+        return snapshot
+
+    @callback
+    def _async_share(self, snapshot: Snapshot, requester=None) -> None:
+        """Push a snapshot to every coordinator but the one that asked for it."""
+        for coordinator in self._coordinators:
+            if coordinator is not requester:
+                coordinator.async_set_updated_data(snapshot)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the snapshot and dose state in their compact forms for saving."""
+        return {
+            "snapshot": self.snapshot.toCompact(),
+            "doses": self.doses.toCompact(),
+            "statistics": self.statistics.toCompact(),
+        }
+
+    @property
+    def wanted_locations(self) -> set | None:
+        """Return the locations any entry needs measurements for, or None for all."""
+        wanted = set()
+        for coordinator in self._coordinators:
+            needed = coordinator.wanted_locations
+            if needed is None:
+                return None
+            wanted |= needed
+        return wanted
+
+    @property
+    def mirrors(self) -> list:
+        """Return the mirrors of every entry, in the order entries registered."""
+        mirrors = {}
+        for coordinator in self._coordinators:
+            mirrors.update(dict.fromkeys(coordinator.mirrors))
+        return list(mirrors)
+
+    @property
+    def flow_ttl(self) -> timedelta:
+        """Return how long flows may reuse a snapshot: the shortest any entry allows."""
+        return min(
+            (coordinator.cache_ttl for coordinator in self._coordinators),
+            default=timedelta(seconds=DEFAULT_CACHE_TTL),
+        )
+
+    @callback
+    def async_apply_mirrors(self) -> None:
+        """Let the client fetch from the mirrors of every registered entry."""
+        self.api.setMirrors(self.mirrors)
+
+    @property
+    def unrecorded_locations(self) -> set | None:
+        """Return the locations any entry has sensors without a state class for.
+
+        That's None for all; sensors with a state class already get
+        statistics from the recorder.
+        """
+        unrecorded = set()
+        for coordinator in self._coordinators:
+            if coordinator.record_samples:
+                continue
+            if coordinator.locations is None:
+                return None
+            unrecorded |= coordinator.locations
+        return unrecorded
+
+    @callback
+    def _async_write_statistics(self) -> None:
+        """Write completed hours to long-term statistics, one batch per location.
+
+        Only unrecorded_locations are written. Hours are kept until the
+        recorder is loaded.
+        """
+        if "recorder" not in self.hass.config.components:
+            return
+        # Imported here so that loading the integration doesn't load the recorder.
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        unrecorded = self.unrecorded_locations
+        for location, hours in self.statistics.take_pending().items():
+            if unrecorded is not None and location not in unrecorded:
+                continue
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{location} UV Index",
+                source=DOMAIN,
+                statistic_id=statistic_id(location),
+                unit_of_measurement=None,
+            )
+            async_add_external_statistics(
+                self.hass,
+                metadata,
+                [
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(start), mean=mean, min=low, max=high
+                    )
+                    for start, mean, low, high in hours
+                ],
+            )
+            _LOGGER.debug(f"Wrote {len(hours)} hour(s) of UV statistics for {location}")
+
+    async def async_get_flow_snapshot(self) -> Snapshot:
+        """Return a snapshot for a config or options flow to offer locations."""
+        return await self.async_get_snapshot(self.flow_ttl)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> ArpansaFeedHub:
+    """Return the shared hub, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB not in domain_data:
+        client = Arpansa(async_get_clientsession(hass))
+        domain_data[DATA_HUB] = ArpansaFeedHub(hass, client)
+    return domain_data[DATA_HUB]
@@ -0,0 +1,823 @@
+"""ARPANSA UV index feed client.
+
+This package doesn't depend on Home Assistant, so it can also be used on
+its own, e.g. `python -m pyarpansa` to collect the feed (see cli.py).
+"""
+from __future__ import annotations
+
+from array import array
+from collections import Counter, deque
+from datetime import datetime, timezone
+from enum import Enum
+import hashlib
+import random
+import time
+from types import MappingProxyType
+from typing import Iterable, NamedTuple
+from xml.etree import ElementTree
+import aiohttp
+import asyncio
+from .metrics import Histogram
+
+ARPANSA_URL = "https://uvdata.arpansa.gov.au/xml/uvvalues.xml"
+
+CHUNK_SIZE = 16384
+# The feed is a few KB; anything much bigger isn't the feed.
+MAX_PAYLOAD = 1048576
+PARSE_BUDGET = 2.0
+MAX_DEPTH = 32
+MAX_INDEX = 30.0
+HEDGE_PERCENTILE = 0.9
+HEDGE_DELAY = 2.0
+HEDGE_MIN_SAMPLES = 5
+DEFAULT_PARSER = "etree"
+ATTEMPT_TIMEOUT = 10
+RETRIES = 2
+BACKOFF = 1.0
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 300
+STATUS_HISTORY = 20
+UTC_FORMAT = "%Y/%m/%d %H:%M"
+LOCAL_FORMAT = "%d/%m/%Y %I:%M %p"
+
+
+class Status(str, Enum):
+    """The status ARPANSA reports for a location."""
+    OK = "ok"
+    NOT_IN_SERVICE = "not in service"
+    UNKNOWN = "unknown"
+
+    @classmethod
+    def _missing_(cls, value):
+        return cls.UNKNOWN
+
+
+class Measurement(NamedTuple):
+    """The latest measurement published for a single location."""
+    friendlyname: str
+    name: str
+    index: float | None
+    localdatetime: datetime | None
+    utcdatetime: datetime | None
+    status: Status
+
+
+class Snapshot:
+    """An immutable, indexed set of measurements from a single fetch.
+
+    A stale Snapshot holds the last good measurements, served while ARPANSA
+    can't be reached. Locations skipped when parsing have no measurement,
+    but are still listed by getAllLocations. Quarantined locations are
+    those whose latest record was malformed; they hold their last good
+    measurement instead (see fromRecords).
+    """
+    __slots__ = ("_locations", "_measurements", "_columns", "_skipped", "quarantined", "stale")
+
+    def __init__(
+        self,
+        measurements: Iterable[Measurement],
+        stale: bool = False,
+        skipped: Iterable[str] = (),
+        quarantined: Iterable[str] = (),
+    ) -> None:
+        self._measurements = tuple(measurements)
+        self._locations = MappingProxyType(
+            {m.friendlyname: m for m in self._measurements}
+        )
+        self._columns = None
+        self._skipped = tuple(skipped)
+        self.quarantined = frozenset(quarantined)
+        self.stale = stale
+
+    @classmethod
+    def fromRecords(
+        cls, measurements: Iterable[Measurement], previous: Snapshot | None = None, skipped=()
+    ) -> Snapshot:
+        """Build a Snapshot from freshly parsed measurements, checking each one.
+
+        A measurement that fails validateMeasurement is quarantined: the
+        location keeps its last good measurement from previous or, if there
+        isn't one, is given an unknown status with no index or times, so
+        nothing downstream takes the bad value for a reading. The rest are
+        published as-is.
+        Measurements without a location id are dropped, as are repeats.
+        """
+        checked = {}
+        quarantined = []
+        for m in measurements:
+            if not m.friendlyname or m.friendlyname in checked:
+                continue
+            if validateMeasurement(m) is not None:
+                quarantined.append(m.friendlyname)
+                last = previous.getLatest(m.friendlyname) if previous is not None else None
+                m = last if last is not None else m._replace(
+                    index=None, localdatetime=None, utcdatetime=None, status=Status.UNKNOWN
+                )
+            checked[m.friendlyname] = m
+        return cls(checked.values(), skipped=skipped, quarantined=quarantined)
+
+    def __len__(self) -> int:
+        return len(self._measurements)
+
+    def __iter__(self):
+        return iter(self._measurements)
+
+    def __contains__(self, name) -> bool:
+        return name in self._locations
+
+    def getAllLocations(self) -> list:
+        """Get the names of all locations, including any skipped when parsing."""
+        return list(self._locations) + list(self._skipped)
+
+    def getAllLatest(self) -> tuple:
+        """Get the latest measurements for all locations."""
+        return self._measurements
+
+    def getLatest(self, name) -> Measurement | None:
+        """Get the latest measurement for a specified location."""
+        return self._locations.get(name)
+
+    def isStale(self, name) -> bool:
+        """Return True if a location's measurement isn't from the latest document."""
+        return self.stale or name in self.quarantined
+
+    def diff(self, previous: Snapshot | None) -> set:
+        """Return the locations whose index, status or time differ from previous.
+
+        Locations that appear in only one of the snapshots, or that went into
+        or came out of quarantine, count as changed.
+        """
+        if previous is None:
+            return set(self._locations)
+        if previous is self:
+            return set()
+        changed = set(self._locations.keys() ^ previous._locations.keys())
+        changed |= self.quarantined ^ previous.quarantined
+        for name, m in self._locations.items():
+            old = previous._locations.get(name)
+            if old is not None and (
+                m.index != old.index
+                or m.status is not old.status
+                or m.utcdatetime != old.utcdatetime
+            ):
+                changed.add(name)
+        return changed
+
+    def columns(self) -> tuple[tuple, array]:
+        """Return the names and indexes of locations reporting ok as columns.
+
+        The columns are built on first use and shared after that.
+        """
+        if self._columns is None:
+            valid = [
+                m for m in self._measurements
+                if m.status is Status.OK and m.index is not None
+            ]
+            self._columns = (
+                tuple(m.friendlyname for m in valid),
+                array("d", (m.index for m in valid)),
+            )
+        return self._columns
+
+    def asStale(self) -> Snapshot:
+        """Return a stale copy of this Snapshot."""
+        return Snapshot(
+            self._measurements, stale=True, skipped=self._skipped, quarantined=self.quarantined
+        )
+
+    def toCompact(self) -> list:
+        """Return the measurements as JSON-friendly lists.
+
+        Timestamps are stored as epoch seconds, taking local times as if
+        they were UTC.
+        """
+        return [
+            [
+                m.friendlyname,
+                m.name,
+                m.index,
+                toTimestamp(m.localdatetime),
+                toTimestamp(m.utcdatetime),
+                m.status.value,
+            ]
+            for m in self._measurements
+        ]
+
+    @classmethod
+    def fromCompact(cls, data: list, stale: bool = False) -> Snapshot:
+        """Rebuild a Snapshot from the output of toCompact."""
+        return cls(
+            (
+                Measurement(
+                    friendlyname,
+                    name,
+                    index,
+                    fromTimestamp(local, None),
+                    fromTimestamp(utc, timezone.utc),
+                    Status(status),
+                )
+                for friendlyname, name, index, local, utc, status in data
+            ),
+            stale=stale,
+        )
+
+
+class CircuitBreaker:
+    """Stop calling a failing endpoint until it has had time to recover.
+
+    After failureThreshold consecutive failures the breaker opens and refuses
+    calls for resetTimeout seconds, then lets a single trial call through.
+    """
+    def __init__(
+        self, failureThreshold: int = FAILURE_THRESHOLD, resetTimeout: float = RESET_TIMEOUT
+    ) -> None:
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.failures = 0
+        self.openedAt = None
+
+    @property
+    def state(self) -> str:
+        """Return whether the breaker is closed, open or half-open."""
+        if self.openedAt is None:
+            return "closed"
+        if time.monotonic() - self.openedAt < self.resetTimeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """Return whether a call may be made."""
+        return self.state != "open"
+
+    def recordSuccess(self) -> None:
+        """Close the breaker after a successful call."""
+        self.failures = 0
+        self.openedAt = None
+
+    def recordFailure(self) -> None:
+        """Count a failed call, opening the breaker if there were too many."""
+        self.failures += 1
+        if self.failures >= self.failureThreshold:
+            self.openedAt = time.monotonic()
+
+
+class MeasurementParser:
+    """Incrementally parse the ARPANSA feed into one Measurement per location.
+
+    Data is fed in a chunk at a time and each <location> element is discarded
+    as soon as its Measurement has been built, so the full document tree is
+    never held in memory. If locations is given, only the locations with
+    those ids are built; the ids of the rest are collected in skipped.
+    Documents nested deeper than MAX_DEPTH are rejected. This is the
+    default backend and only needs the standard library.
+    """
+    def __init__(self, locations=None) -> None:
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+        self._locations = locations
+        self.skipped = []
+
+    def feed(self, data: bytes) -> list:
+        """Feed a chunk of the document, returning any completed locations."""
+        try:
+            self._parser.feed(data)
+            return self._drain()
+        except SyntaxError as err:
+            raise DocumentError(f"Invalid ARPANSA document: {err}") from err
+
+    def close(self) -> list:
+        """Finish parsing, returning any remaining locations."""
+        try:
+            self._parser.close()
+            return self._drain()
+        except SyntaxError as err:
+            raise DocumentError(f"Invalid ARPANSA document: {err}") from err
+
+    def _drain(self) -> list:
+        measurements = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                if self._depth > MAX_DEPTH:
+                    raise PayloadError(f"ARPANSA document nested deeper than {MAX_DEPTH}")
+                if self._root is None:
+                    self._root = element
+                continue
+            self._depth -= 1
+            if element.tag == "location":
+                self._build(element, measurements)
+                self._root.clear()
+        return measurements
+
+    def _build(self, element, measurements: list) -> None:
+        name = element.get("id")
+        if self._locations is None or name in self._locations:
+            measurements.append(extractMeasurement(element))
+        else:
+            self.skipped.append(name)
+
+
+class LxmlMeasurementParser(MeasurementParser):
+    """Parse the ARPANSA feed with lxml, which is only imported when chosen.
+
+    libxml2 limits how deeply documents may be nested itself.
+    """
+    def __init__(self, locations=None) -> None:
+        from lxml import etree
+
+        self._parser = etree.XMLPullParser(events=("end",), tag="location")
+        self._locations = locations
+        self.skipped = []
+
+    def _drain(self) -> list:
+        measurements = []
+        for _, element in self._parser.read_events():
+            self._build(element, measurements)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return measurements
+
+
+PARSERS = {
+    "etree": MeasurementParser,
+    "lxml": LxmlMeasurementParser,
+}
+
+
+class Endpoint:
+    """A URL the feed can be fetched from, and how well it has been serving it."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.latencies = Histogram()
+        self.failures = 0
+        self.stats = Counter()
+
+    @property
+    def healthy(self) -> bool:
+        """Return False after repeated consecutive failures."""
+        return self.failures < FAILURE_THRESHOLD
+
+    def hedgeDelay(self, timeout: float) -> float:
+        """Return how long to wait on this endpoint before asking another.
+
+        That's the HEDGE_PERCENTILE latency, once there are enough samples
+        to go by, and HEDGE_DELAY until then.
+        """
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            delay = HEDGE_DELAY
+        else:
+            delay = self.latencies.percentile(HEDGE_PERCENTILE)
+        return min(delay, timeout / 2)
+
+    def summary(self) -> dict:
+        """Return the endpoint's health, latencies and counts."""
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "latency_seconds": self.latencies.summary(),
+            **self.stats,
+        }
+
+
+class Arpansa:
+    """Arpansa class fetches the latest measurements from the ARPANSA site"""
+    def __init__(
+        self,session: aiohttp.ClientSession,
+        url: str = ARPANSA_URL,
+        timeout: float = ATTEMPT_TIMEOUT,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        breaker: CircuitBreaker | None = None,
+        parser: str = DEFAULT_PARSER,
+        maxPayload: int = MAX_PAYLOAD,
+        parseBudget: float = PARSE_BUDGET,
+        mirrors: Iterable[str] = (),
+    ) -> None:
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser backend: {parser}")
+        self._session = session
+        self.parser = parser
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.maxPayload = maxPayload
+        self.parseBudget = parseBudget
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = Counter()
+        self.latencies = Histogram()
+        self.parseTimes = Histogram(low=0.0001, high=10.0)
+        self.payloadSizes = Histogram(low=1000.0, high=100000000.0)
+        self.statuses = deque(maxlen=STATUS_HISTORY)
+        # Only locations with these ids are parsed, or all of them if None.
+        self.locations = None
+        self.url = url
+        self.measurements = None
+        self._etag = None
+        self._lastModified = None
+        self._digest = None
+        # The last document is kept as fetched, along with the locations it
+        # was parsed for, so refilter can parse it for more locations without
+        # fetching it again.
+        self._chunks = None
+        self._parsedLocations = None
+        self._stale = None
+        self.endpoints = [Endpoint(url)]
+        self.setMirrors(mirrors)
+
+    def setMirrors(self, mirrors: Iterable[str]) -> None:
+        """Set the URLs observations may also be fetched from, after url.
+
+        Endpoints that are kept keep their history.
+        """
+        known = {endpoint.url: endpoint for endpoint in self.endpoints}
+        urls = [self.url] + [mirror for mirror in mirrors if mirror != self.url]
+        self.endpoints = [known.get(url) or Endpoint(url) for url in dict.fromkeys(urls)]
+
+    def rankedEndpoints(self) -> list:
+        """Return the endpoints, healthy and fastest first.
+
+        Endpoints not heard from yet come first, in their configured order,
+        so that each gets measured; failing ones drop down the list.
+        """
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                not endpoint.healthy,
+                endpoint.failures,
+                endpoint.latencies.percentile(0.5) or 0.0,
+            ),
+        )
+
+    @property
+    def cacheHitRate(self) -> float | None:
+        """Return the share of requests answered without parsing the feed."""
+        if not self.stats["requests"]:
+            return None
+        return (self.stats["not_modified"] + self.stats["unchanged"]) / self.stats["requests"]
+
+    async def fetchLatestMeasurements(self):
+        """Retrieve the latest data from the ARPANSA site.
+
+        Each attempt is limited to timeout seconds and transient failures
+        (timeouts, connection errors, 5xx responses and truncated documents)
+        are retried with exponential backoff and jitter, but responses that
+        are too big or complex to accept are not. If every attempt
+        fails, or the circuit breaker is open after repeated failures, the
+        last good Snapshot is returned marked as stale. ApiError is only
+        raised when there is no earlier Snapshot to fall back on.
+        """
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            return self._fallBack(ApiError("ARPANSA requests suspended after repeated failures"))
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            start = time.monotonic()
+            try:
+                snapshot = await asyncio.wait_for(self._fetch(), self.timeout)
+            except Exception as err:
+                self.stats["failures"] += 1
+                if isinstance(err, PayloadError):
+                    self.stats["rejected"] += 1
+                error = err
+                if not isinstance(err, RETRYABLE_ERRORS):
+                    break
+            else:
+                self.latencies.record(time.monotonic() - start)
+                self.breaker.recordSuccess()
+                return snapshot
+        self.breaker.recordFailure()
+        return self._fallBack(error)
+
+    async def _fetch(self) -> Snapshot:
+        """Make a single attempt at fetching the latest observations."""
+        previous = self.measurements
+        snapshot = await self._fetchHedged()
+        if snapshot is not previous:
+            self._stale = None
+            if snapshot.quarantined:
+                self.stats["quarantined"] += len(snapshot.quarantined)
+        return snapshot
+
+    async def _fetchHedged(self) -> Snapshot:
+        """Fetch the observations from whichever endpoint answers first.
+
+        The request goes to the best ranked endpoint. If it hasn't answered
+        within that endpoint's hedge delay, the same request is also sent to
+        the next endpoint, and so on; if one fails, the next is tried
+        straight away. The first answer is used and the rest are cancelled.
+        """
+        waiting = self.rankedEndpoints()
+        pending = {}
+        error = None
+
+        def launch() -> Endpoint | None:
+            if not waiting:
+                return None
+            endpoint = waiting.pop(0)
+            pending[asyncio.ensure_future(self._fetchFrom(endpoint))] = endpoint
+            return endpoint
+
+        latest = launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=latest.hedgeDelay(self.timeout) if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.stats["hedged"] += 1
+                    latest = launch()
+                    continue
+                for task in done:
+                    del pending[task]
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                latest = launch() or latest
+            raise error
+        finally:
+            for task, endpoint in pending.items():
+                task.cancel()
+                endpoint.stats["cancelled"] += 1
+
+    async def _fetchFrom(self, endpoint: Endpoint) -> Snapshot:
+        """Fetch the observations from one endpoint, tracking how it went."""
+        endpoint.stats["requests"] += 1
+        start = time.monotonic()
+        try:
+            snapshot = await self._fetchFeed(endpoint.url)
+        except asyncio.CancelledError:
+            # Lost a hedge: it took at least this long, which is still worth
+            # knowing when ranking it against the endpoint that won.
+            endpoint.latencies.record(time.monotonic() - start)
+            raise
+        except Exception:
+            endpoint.failures += 1
+            endpoint.stats["failures"] += 1
+            raise
+        endpoint.latencies.record(time.monotonic() - start)
+        endpoint.failures = 0
+        return snapshot
+
+    async def refilter(self) -> Snapshot | None:
+        """Parse the last document again if it's missing any of locations.
+
+        This lets more locations be added without fetching anything. Returns
+        the Snapshot that would now be served, if there is one.
+        """
+        if self._chunks is not None and not covers(self._parsedLocations, self.locations):
+            await self._parse(self._chunks)
+            if self._stale is not None:
+                self._stale = self.measurements.asStale()
+        return self.measurements if self._stale is None else self._stale
+
+    async def _fetchFeed(self, url: str | None = None) -> Snapshot:
+        """Make a single attempt at fetching the observations.
+
+        Requests are conditional on the last response's ETag and
+        Last-Modified headers. If the server reports the data is not modified,
+        or the body hashes the same as last time, the last Snapshot is
+        returned as-is without parsing, unless it was parsed for fewer
+        locations than are now wanted.
+
+        Each chunk of the body is hashed and fed to the incremental parser
+        as it arrives, the parsing running in an executor so that it never
+        blocks the event loop. If the finished body hashes the same as last
+        time, what was parsed is thrown away. The chunks are kept as
+        received, without copying them into one buffer, and the last
+        document is kept on purpose after parsing, so refilter can parse it
+        for more locations without fetching it again.
+
+        Bodies over maxPayload bytes are abandoned as soon as that is clear,
+        and parsing is abandoned once it has taken parseBudget seconds in all,
+        raising PayloadError; the last Snapshot is kept as it was.
+        """
+        headers = {}
+        if self.measurements is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._lastModified:
+                headers["If-Modified-Since"] = self._lastModified
+        self.stats["requests"] += 1
+        async with self._session.get(url or self.url, headers=headers) as response:
+            self.statuses.append((time.time(), response.status))
+            if response.status == 304 and self.measurements is not None:
+                self.stats["not_modified"] += 1
+                if not covers(self._parsedLocations, self.locations):
+                    await self._parse(self._chunks)
+                return self.measurements
+            if response.status >= 500:
+                raise ServerError(f"Unexpected response from ARPANSA server: {response.status}")
+            if response.status != 200:
+                raise ApiError(f"Unexpected response from ARPANSA server: {response.status}")
+            length = response.headers.get("Content-Length")
+            if length is not None and length.isdigit() and int(length) > self.maxPayload:
+                raise PayloadError(f"ARPANSA response of {length} bytes is too large")
+            loop = asyncio.get_running_loop()
+            locations = self.locations
+            parser = PARSERS[self.parser](locations)
+            digest = hashlib.sha256()
+            chunks = []
+            records = []
+            size = 0
+            elapsed = 0.0
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.maxPayload:
+                    raise PayloadError(f"ARPANSA response is over {self.maxPayload} bytes")
+                digest.update(chunk)
+                chunks.append(chunk)
+                elapsed += await loop.run_in_executor(None, timeFeed, parser, chunk, records)
+                if elapsed > self.parseBudget:
+                    raise PayloadError(
+                        f"Parsing the ARPANSA document took over {self.parseBudget} seconds"
+                    )
+            etag = response.headers.get("ETag")
+            lastModified = response.headers.get("Last-Modified")
+        elapsed += await loop.run_in_executor(None, timeFeed, parser, None, records)
+        digest = digest.digest()
+        self.payloadSizes.record(size)
+        self.parseTimes.record(elapsed)
+        if digest == self._digest and self.measurements is not None:
+            self.stats["unchanged"] += 1
+            # Nothing has changed, unless the document was last parsed for
+            # fewer locations than this time.
+            if not covers(self._parsedLocations, locations):
+                self._keep(records, parser.skipped, chunks, locations)
+        else:
+            self.stats["full"] += 1
+            self._keep(records, parser.skipped, chunks, locations)
+            self._digest = digest
+        self._etag = etag
+        self._lastModified = lastModified
+        return self.measurements
+
+    async def _parse(self, chunks: list) -> None:
+        """Parse a document for the wanted locations into measurements."""
+        locations = self.locations
+        records, skipped, elapsed = await asyncio.get_running_loop().run_in_executor(
+            None, timeParse, chunks, self.parser, locations, self.parseBudget
+        )
+        self.parseTimes.record(elapsed)
+        self._keep(records, skipped, chunks, locations)
+
+    def _keep(self, records: list, skipped: list, chunks: list, locations) -> None:
+        """Make the records parsed from a document for locations the measurements."""
+        self.measurements = Snapshot.fromRecords(records, self.measurements, skipped)
+        self._chunks = chunks
+        self._parsedLocations = locations
+
+    def _fallBack(self, error: Exception) -> Snapshot:
+        """Serve the last good Snapshot as stale, or raise if there isn't one."""
+        if self.measurements is None:
+            if isinstance(error, ApiError):
+                raise error
+            raise ApiError(f"Could not fetch ARPANSA data: {error!r}") from error
+        self.stats["stale"] += 1
+        if self._stale is None:
+            self._stale = self.measurements.asStale()
+        return self._stale
+
+    def getAllLocations(self) -> list:
+        """Get the names of all locations."""
+        return self.measurements.getAllLocations()
+
+    def getAllLatest(self) -> tuple:
+        """Get the latest measurements for all locations."""
+        return self.measurements.getAllLatest()
+
+    def getLatest(self,name) -> Measurement | None:
+        """Get the latest measurements for a specified location."""
+        return self.measurements.getLatest(name)
+
+def timeFeed(parser: MeasurementParser, chunk: bytes | None, measurements: list) -> float:
+    """Feed a chunk to parser, or close it if chunk is None, returning the seconds taken.
+
+    Any completed locations are added to measurements.
+    """
+    start = time.perf_counter()
+    measurements += parser.close() if chunk is None else parser.feed(chunk)
+    return time.perf_counter() - start
+
+def timeParse(
+    chunks, backend: str = DEFAULT_PARSER, locations=None, budget=None
+) -> tuple[list, list, float]:
+    """Parse a document as parseDocument does, also returning the seconds taken."""
+    start = time.perf_counter()
+    measurements, skipped = parseDocument(chunks, backend, locations, budget)
+    return measurements, skipped, time.perf_counter() - start
+
+def parseMeasurements(chunks, backend: str = DEFAULT_PARSER, locations=None) -> list:
+    """Parse a document, given as a sequence of chunks, into Measurements."""
+    return parseDocument(chunks, backend, locations)[0]
+
+def parseDocument(
+    chunks, backend: str = DEFAULT_PARSER, locations=None, budget=None
+) -> tuple[list, list]:
+    """Parse a document into Measurements, and the ids of the locations skipped.
+
+    If locations is given, only the locations with those ids are made into
+    Measurements. If budget is given, PayloadError is raised once parsing has
+    taken that many seconds, checked between chunks.
+    """
+    parser = PARSERS[backend](locations)
+    measurements = []
+    deadline = None if budget is None else time.perf_counter() + budget
+    for chunk in chunks:
+        measurements += parser.feed(chunk)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise PayloadError(f"Parsing the ARPANSA document took over {budget} seconds")
+    measurements += parser.close()
+    return measurements, parser.skipped
+
+def covers(parsed, wanted) -> bool:
+    """Return True if parsing for the parsed locations included the wanted ones.
+
+    Either may be None, for all locations.
+    """
+    if parsed is None:
+        return True
+    return wanted is not None and wanted <= parsed
+
+def extractMeasurement(element) -> Measurement:
+    """Convert a <location> element into a Measurement."""
+    extracted = {}
+    for state in element:
+        extracted[state.tag] = state.text or ""
+    return Measurement(
+        friendlyname=element.get("id"),
+        name=extracted.get("name", ""),
+        index=parseIndex(extracted.get("index")),
+        localdatetime=parseDatetime(
+            f"{extracted.get('date')} {extracted.get('time')}", LOCAL_FORMAT
+        ),
+        utcdatetime=parseDatetime(extracted.get("utcdatetime"), UTC_FORMAT, timezone.utc),
+        status=Status(extracted.get("status", "").strip().lower()),
+    )
+
+def validateMeasurement(m: Measurement) -> str | None:
+    """Return what is wrong with a measurement, or None if it looks sound.
+
+    A location in service must have an index in range and a UTC time; a
+    status the feed has never used is also suspect.
+    """
+    if m.status is Status.UNKNOWN:
+        return "unknown status"
+    if m.status is Status.OK:
+        if m.index is None:
+            return "missing index"
+        if not 0 <= m.index <= MAX_INDEX:
+            return f"index {m.index} out of range"
+        if m.utcdatetime is None:
+            return "missing time"
+    return None
+
+def parseIndex(value) -> float | None:
+    """Parse a UV index, returning None if it isn't a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parseDatetime(value, format, tz=None) -> datetime | None:
+    """Parse a timestamp from the feed, returning None if it is malformed."""
+    try:
+        return datetime.strptime(value, format).replace(tzinfo=tz)
+    except (TypeError, ValueError):
+        return None
+
+def toTimestamp(value: datetime | None) -> int | None:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value is None:
+        return None
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+def fromTimestamp(value: int | None, tz) -> datetime | None:
+    """Convert epoch seconds from toTimestamp back to a datetime."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=tz)
+
+class ApiError(Exception):
+    """Raised when there is a problem accessing the ARPANSA data."""
+    pass
+
+class ServerError(ApiError):
+    """Raised when the ARPANSA server reports an error of its own."""
+    pass
+
+class DocumentError(ApiError):
+    """Raised when the ARPANSA document is malformed or incomplete."""
+    pass
+
+class PayloadError(ApiError):
+    """Raised when an ARPANSA response is too big or complex to accept."""
+    pass
+
+RETRYABLE_ERRORS = (asyncio.TimeoutError, aiohttp.ClientError, ServerError, DocumentError)
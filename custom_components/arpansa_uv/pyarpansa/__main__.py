@@ -0,0 +1,6 @@
+"""Run the ARPANSA collector, see cli.py."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
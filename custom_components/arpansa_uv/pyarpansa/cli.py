@@ -0,0 +1,184 @@
+"""Poll the ARPANSA feed and write each new snapshot out.
+
+    python -m pyarpansa [--interval SECONDS] [--count N] [--format FORMAT]
+                        [--output PATH] [--location NAME ...] [--mirror URL ...]
+
+Snapshots are written to stdout, or appended to --output; a path ending in
+.gz is appended to as a gzip stream, one member per snapshot. Only snapshots
+that differ from the last one written are written again. One HTTP session is
+kept for the whole run, so polls reuse the connection and send conditional
+requests, exactly as the Home Assistant integration does.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+
+import aiohttp
+
+from . import ARPANSA_URL, DEFAULT_PARSER, PARSERS, ApiError, Arpansa, Measurement, Snapshot
+
+DEFAULT_INTERVAL = 60.0
+FORMATS = ("text", "ndjson", "csv")
+CSV_FIELDS = ("location", "name", "index", "local", "utc", "status", "stale")
+
+
+def toRecord(measurement: Measurement, stale: bool) -> dict:
+    """Return a measurement as a flat, JSON-friendly dict."""
+    return {
+        "location": measurement.friendlyname,
+        "name": measurement.name,
+        "index": measurement.index,
+        "local": measurement.localdatetime.isoformat() if measurement.localdatetime else None,
+        "utc": measurement.utcdatetime.isoformat() if measurement.utcdatetime else None,
+        "status": measurement.status.value,
+        "stale": stale,
+    }
+
+
+def formatText(records: list[dict]) -> str:
+    """Format records as aligned, human readable lines."""
+    return "".join(
+        f"{r['utc'] or '-':<26} {r['location']:<20} {r['index'] if r['index'] is not None else '-':>5} {r['status']}"
+        f"{' (stale)' if r['stale'] else ''}\n"
+        for r in records
+    )
+
+
+def formatNdjson(records: list[dict]) -> str:
+    """Format records as one JSON object per line."""
+    return "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+
+def formatCsv(records: list[dict], header: bool) -> str:
+    """Format records as CSV rows, optionally after a header row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_FIELDS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+class SnapshotWriter:
+    """Write snapshots to a stream or append them to a (gzipped) file."""
+
+    def __init__(self, format: str = "ndjson", path: str | None = None, locations=None) -> None:
+        """Initialize."""
+        self.format = format
+        self.path = path
+        self.locations = set(locations) if locations else None
+        self.written = 0
+        # A CSV header is only needed at the start of a new file.
+        self._header = format == "csv"
+        if path is not None and format == "csv":
+            try:
+                with open(path, "rb") as existing:
+                    self._header = not existing.read(1)
+            except FileNotFoundError:
+                pass
+
+    def write(self, snapshot: Snapshot) -> None:
+        """Write out a snapshot's measurements."""
+        records = [
+            toRecord(m, snapshot.isStale(m.friendlyname))
+            for m in snapshot
+            if self.locations is None or m.friendlyname in self.locations
+        ]
+        if self.format == "csv":
+            text = formatCsv(records, self._header)
+            self._header = False
+        elif self.format == "ndjson":
+            text = formatNdjson(records)
+        else:
+            text = formatText(records)
+        data = text.encode()
+        if self.path is None:
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+        elif self.path.endswith(".gz"):
+            # Each write is a complete gzip member, so the file stays readable
+            # even if the collector is killed part way through.
+            with open(self.path, "ab") as file:
+                file.write(gzip.compress(data))
+        else:
+            with open(self.path, "ab") as file:
+                file.write(data)
+        self.written += 1
+
+
+async def collect(
+    writer: SnapshotWriter,
+    url: str = ARPANSA_URL,
+    interval: float = DEFAULT_INTERVAL,
+    count: int = 0,
+    parser: str = DEFAULT_PARSER,
+    mirrors=(),
+) -> Arpansa:
+    """Poll the feed every interval seconds, writing each new snapshot.
+
+    Stops after count polls, or runs until cancelled if count is 0.
+    """
+    async with aiohttp.ClientSession() as session:
+        arpansa = Arpansa(session, url=url, parser=parser, mirrors=mirrors)
+        # Don't build measurements that won't be written.
+        arpansa.locations = writer.locations
+        last = None
+        polls = 0
+        start = time.monotonic()
+        while True:
+            try:
+                snapshot = await arpansa.fetchLatestMeasurements()
+            except ApiError as err:
+                print(f"Could not fetch ARPANSA data: {err}", file=sys.stderr)
+            else:
+                if snapshot is not last:
+                    writer.write(snapshot)
+                    last = snapshot
+            polls += 1
+            if count and polls >= count:
+                return arpansa
+            # Keep to the schedule however long each poll took.
+            await asyncio.sleep(max(0.0, start + polls * interval - time.monotonic()))
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="pyarpansa", description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=ARPANSA_URL, help="feed URL")
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--count", type=int, default=0, help="stop after this many polls (default: run forever)"
+    )
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", help="append to this file instead of stdout; .gz to compress")
+    parser.add_argument(
+        "--location", action="append", dest="locations", help="only write this location (repeatable)"
+    )
+    parser.add_argument(
+        "--mirror", action="append", dest="mirrors", default=[],
+        help="also fetch from this URL when --url is slow or failing (repeatable)",
+    )
+    parser.add_argument("--parser", choices=list(PARSERS), default=DEFAULT_PARSER)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the collector."""
+    args = parseArgs(argv)
+    writer = SnapshotWriter(args.format, args.output, args.locations)
+    try:
+        asyncio.run(
+            collect(writer, args.url, args.interval, args.count, args.parser, args.mirrors)
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
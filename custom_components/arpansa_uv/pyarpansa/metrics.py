@@ -0,0 +1,73 @@
+"""Low-overhead histograms for instrumenting ARPANSA fetches."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+import math
+
+
+class Histogram:
+    """Count values into fixed, logarithmically spaced buckets.
+
+    Recording a value is a bisect into precomputed bucket bounds and an
+    increment, with nothing allocated, so instrumentation can stay on all
+    the time. Percentiles are estimated as the upper bound of the bucket
+    they fall in, which is within one bucket's width (about 26% with the
+    default ten buckets a decade) of the true value.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "max", "last")
+
+    def __init__(self, low: float = 0.001, high: float = 100.0, perDecade: int = 10) -> None:
+        """Initialize with buckets spanning low to high."""
+        buckets = math.ceil(math.log10(high / low) * perDecade)
+        self.bounds = tuple(low * 10 ** (i / perDecade) for i in range(buckets + 1))
+        # The last bucket counts everything above high.
+        self.counts = array("Q", bytes(8 * (len(self.bounds) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.max: float | None = None
+        self.last: float | None = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float | None:
+        """Return an estimate of the q-th quantile, q in [0, 1]."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        if bucket == len(self.bounds):
+            return self.max
+        return min(self.bounds[bucket], self.max)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the recorded values."""
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> dict:
+        """Return the count, mean, max, last value and common percentiles."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            "last": self.last,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
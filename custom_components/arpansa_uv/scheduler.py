@@ -0,0 +1,53 @@
+"""Adaptive polling schedule for the ARPANSA feed."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import random
+
+from .pyarpansa import Snapshot, Status
+
+CADENCE = timedelta(minutes=1)
+IDLE_INTERVAL = timedelta(minutes=30)
+PUBLISH_DELAY = timedelta(seconds=20)
+MAX_JITTER = timedelta(seconds=15)
+STALE_CADENCES = 10
+
+
+class AdaptiveScheduler:
+    """Work out how long to wait before polling ARPANSA again.
+
+    The configured interval is the shortest wait. Beyond that, polls are
+    aligned to just after the feed next expects to publish, going by the
+    cadence of its utcdatetime stamps, and back off to IDLE_INTERVAL while
+    every location reads zero or is out of service (i.e. overnight). Each
+    scheduler adds its own fixed jitter so that entries, and installs, don't
+    all poll on the same second.
+    """
+
+    def __init__(self, interval: timedelta) -> None:
+        """Initialize."""
+        self.interval = interval
+        self.cadence = CADENCE
+        self.jitter = timedelta(seconds=random.uniform(0, MAX_JITTER.total_seconds()))
+        self._latest: datetime | None = None
+
+    def next_interval(self, snapshot: Snapshot | None, now: datetime) -> timedelta:
+        """Return how long to wait after now before the next poll."""
+        if not snapshot:
+            return self.interval + self.jitter
+        active = [
+            m for m in snapshot if m.status is Status.OK and m.utcdatetime is not None
+        ]
+        if not any(m.index for m in active):
+            return max(self.interval, IDLE_INTERVAL) + self.jitter
+
+        latest = max(m.utcdatetime for m in active)
+        if self._latest is not None and latest > self._latest:
+            self.cadence = min(max(latest - self._latest, CADENCE), IDLE_INTERVAL)
+        self._latest = latest
+        if now - latest > self.cadence * STALE_CADENCES:
+            return self.interval + self.jitter
+
+        published = latest + PUBLISH_DELAY
+        periods = max(0, -((published - (now + self.interval)) // self.cadence))
+        return published + periods * self.cadence - now + self.jitter
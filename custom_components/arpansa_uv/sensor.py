@@ -7,55 +7,341 @@ from datetime import (
     date,
     datetime,
 )
-from typing import Any, Dict
+from typing import Any
 from collections.abc import Mapping
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
     StateType,
 )
+from homeassistant.const import (
+    ATTR_LATITUDE,
+    ATTR_LONGITUDE,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
 
 from .const import (
     DOMAIN,
     ATTRIBUTION,
     CONF_LOCATIONS,
+    CONF_NEAREST,
+    CONF_RECORD_SAMPLES,
+    CONF_SKIN_TYPE,
+    CONF_TRACKED,
+    DEFAULT_SKIN_TYPE,
 )
+from .aggregate import CATEGORIES
+from .dose import time_to_burn
+from .history import MEAN_WINDOW, THRESHOLD
+from .pyarpansa import Measurement, Status
+from .stations import Interpolator
 
+from homeassistant.core import Event, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sensors derived from each location's history:
+# key: (name, value, unit, device class, state class)
+HISTORY_SENSORS = {
+    "daily_peak": (
+        "Daily Peak UV Index",
+        lambda history: history.peak,
+        None,
+        None,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "daily_peak_time": (
+        "Daily Peak UV Time",
+        lambda history: history.peak_time,
+        None,
+        SensorDeviceClass.TIMESTAMP,
+        None,
+    ),
+    "minutes_above_threshold": (
+        f"Minutes Above UV {THRESHOLD:g} Today",
+        lambda history: round(history.minutes_above, 1),
+        UnitOfTime.MINUTES,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.TOTAL_INCREASING,
+    ),
+    "rolling_mean": (
+        f"{int(MEAN_WINDOW.total_seconds() // 60)} Minute Mean UV Index",
+        lambda history: round(history.mean, 2),
+        None,
+        None,
+        SensorStateClass.MEASUREMENT,
+    ),
+}
+
+# Sensors derived from the dose each location has received today.
+DOSE_SENSORS = {
+    "daily_dose": (
+        "Erythemal Dose Today",
+        "SED",
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+    ),
+    "time_to_burn": (
+        "Time To Burn",
+        UnitOfTime.MINUTES,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+}
+
+# Sensors aggregated across each configured region: key: (name, value)
+AGGREGATE_SENSORS = {
+    "max": ("Max UV Index", lambda aggregate: aggregate.max),
+    "mean": (
+        "Mean UV Index",
+        lambda aggregate: None if aggregate.mean is None else round(aggregate.mean, 2),
+    ),
+    **{
+        category: (
+            f"Locations At {inflection.titleize(category)} UV Or Above",
+            lambda aggregate, category=category: aggregate.above[category],
+        )
+        for category in CATEGORIES
+    },
+}
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+# Sensors describing the integration's own performance:
+# key: (name, value, unit, device class, state class)
+DIAGNOSTIC_SENSORS = {
+    "fetch_latency_p50": (
+        "Fetch Latency (Median)",
+        lambda coordinator: _milliseconds(coordinator.api.latencies.percentile(0.5)),
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "fetch_latency_p95": (
+        "Fetch Latency (95th Percentile)",
+        lambda coordinator: _milliseconds(coordinator.api.latencies.percentile(0.95)),
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "parse_time": (
+        "Parse Time",
+        lambda coordinator: _milliseconds(coordinator.api.parseTimes.last),
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "payload_size": (
+        "Payload Size",
+        lambda coordinator: coordinator.api.payloadSizes.last,
+        UnitOfInformation.BYTES,
+        SensorDeviceClass.DATA_SIZE,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "snapshot_age": (
+        "Snapshot Age",
+        lambda coordinator: None if coordinator.hub.age is None else round(coordinator.hub.age.total_seconds()),
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "locations_parsed": (
+        "Locations Parsed",
+        lambda coordinator: len(coordinator.data) if coordinator.data is not None else None,
+        None,
+        None,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "cache_hit_rate": (
+        "Cache Hit Rate",
+        lambda coordinator: None if coordinator.api.cacheHitRate is None else round(coordinator.api.cacheHitRate * 100, 1),
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "suppressed_writes": (
+        "Suppressed State Writes",
+        lambda coordinator: coordinator.suppressed,
+        None,
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+    ),
+}
+
 async def async_setup_entry(hass, config_entry, async_add_entities: AddEntitiesCallback):
     """Set up ARPANSA UV."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
     sensors = list()
-    locations = list()
-    if config_entry.data[CONF_LOCATIONS] is not None:
-        for location in config_entry.data[CONF_LOCATIONS]:
-            _LOGGER.debug(f"Getting latest data for location {location}")
-            locations += [coordinator.api.getLatest(location)]
-    else: 
-        locations = coordinator.api.getAllLatest()
+    points = _tracked_points(hass, config_entry)
+    for key, label, latitude, longitude, entity_id in points:
+        sensors += [ArpansaInterpolatedSensor(
+            coordinator, config_entry.entry_id, key, label, latitude, longitude, entity_id
+        )]
+
+    # Make sure the snapshot has every location the sensors will need.
+    selected = _selected_locations(coordinator, config_entry, points)
+    coordinator.locations = None if selected is None else set(selected)
+    await coordinator.hub.async_refilter()
+
+    coordinator.location_sensors = LocationSensors(coordinator, config_entry, async_add_entities)
+    sensors += coordinator.location_sensors.create(selected)
+
+    if coordinator.aggregator is not None:
+        for region in coordinator.aggregator.regions:
+            sensors += [
+                ArpansaAggregateSensor(coordinator, config_entry.entry_id, region, kind)
+                for kind in AGGREGATE_SENSORS
+            ]
+
+    sensors += [ArpansaDiagnosticSensor(coordinator, config_entry.entry_id, kind) for kind in DIAGNOSTIC_SENSORS]
+
+    async_add_entities(sensors)
+
+
+def _tracked_points(hass, config_entry) -> list:
+    """Return the points to interpolate the UV index at.
+
+    In automatic mode, that's home, as well as each tracked zone or device
+    tracker: (key, label, latitude, longitude, entity id).
+    """
+    nearest = config_entry.options.get(
+        CONF_NEAREST, config_entry.data.get(CONF_NEAREST, False)
+    )
+    tracked = config_entry.options.get(
+        CONF_TRACKED, config_entry.data.get(CONF_TRACKED, [])
+    )
+    points = list()
+    if nearest:
+        points += [("home", "Home", hass.config.latitude, hass.config.longitude, None)]
+    for entity_id in tracked:
+        state = hass.states.get(entity_id)
+        if state is None or ATTR_LATITUDE not in state.attributes:
+            _LOGGER.warning(f"Not tracking {entity_id}, it has no location")
+            continue
+        points += [(
+            entity_id.replace(".", "_"),
+            state.name,
+            state.attributes[ATTR_LATITUDE],
+            state.attributes[ATTR_LONGITUDE],
+            entity_id,
+        )]
+    return points
+
 
-    for details in locations:
-        _LOGGER.debug(f"Creating sensor from {details}")
-        sensors += [ArpansaSensor(coordinator,details)]
+def _selected_locations(coordinator, config_entry, points: list) -> list | None:
+    """Return the locations to create sensors for, or None for all of them.
 
-    async_add_entities(sensors, update_before_add=True)
+    That's the chosen locations, and the location nearest to each point.
+    """
+    selected = config_entry.options.get(
+        CONF_LOCATIONS, config_entry.data.get(CONF_LOCATIONS)
+    )
+    if points:
+        selected = list(selected or [])
+        for key, label, latitude, longitude, entity_id in points:
+            station, distance = coordinator.hub.stations.nearest(latitude, longitude)[0]
+            _LOGGER.debug(f"Nearest location to {label} is {station}, {distance:.0f} km away")
+            if station not in selected and station in coordinator.data.getAllLocations():
+                selected += [station]
+    return selected
+
+
+class LocationSensors:
+    """The sensors for each of an entry's locations.
+
+    These are kept by location so that when the entry's locations change,
+    only the sensors of the locations added or removed need to be touched.
+    """
+
+    def __init__(self, coordinator, config_entry, async_add_entities: AddEntitiesCallback) -> None:
+        """Initialize."""
+        self.sensors: dict[str, list] = {}
+        self._coordinator = coordinator
+        self._entry = config_entry
+        self._add_entities = async_add_entities
+
+    def create(self, selected: list | None) -> list:
+        """Create sensors for each selected location that doesn't have them yet."""
+        coordinator = self._coordinator
+        config_entry = self._entry
+        if selected is not None:
+            locations = list()
+            for location in selected:
+                _LOGGER.debug(f"Getting latest data for location {location}")
+                locations += [coordinator.data.getLatest(location)]
+        else: 
+            locations = coordinator.data.getAllLatest()
+
+        skin_type = config_entry.options.get(
+            CONF_SKIN_TYPE, config_entry.data.get(CONF_SKIN_TYPE, DEFAULT_SKIN_TYPE)
+        )
+        record_samples = config_entry.options.get(
+            CONF_RECORD_SAMPLES, config_entry.data.get(CONF_RECORD_SAMPLES, True)
+        )
+        sensor_class = ArpansaSensor if record_samples else ArpansaUnrecordedSensor
+        sensors = list()
+        for details in locations:
+            if details is None or details.friendlyname in self.sensors:
+                continue
+            _LOGGER.debug(f"Creating sensor from {details}")
+            entry_id = config_entry.entry_id
+            created = [sensor_class(coordinator,entry_id,details)]
+            created += [ArpansaHistorySensor(coordinator,entry_id,details,kind) for kind in HISTORY_SENSORS]
+            created += [ArpansaDoseSensor(coordinator,entry_id,details,kind,skin_type) for kind in DOSE_SENSORS]
+            self.sensors[details.friendlyname] = created
+            sensors += created
+        coordinator.locations = set(self.sensors)
+        return sensors
+
+    async def async_update(self) -> None:
+        """Add and remove sensors to match the entry's locations."""
+        coordinator = self._coordinator
+        selected = _selected_locations(
+            coordinator, self._entry, _tracked_points(coordinator.hass, self._entry)
+        )
+        coordinator.locations = None if selected is None else set(selected)
+        await coordinator.hub.async_refilter()
+        wanted = set(coordinator.data.getAllLocations() if selected is None else selected)
+        registry = er.async_get(coordinator.hass)
+        for location in set(self.sensors) - wanted:
+            _LOGGER.debug(f"Removing sensors for location {location}")
+            for sensor in self.sensors.pop(location):
+                # Sensors disabled by default were never added to hass.
+                if sensor.hass is not None:
+                    await sensor.async_remove(force_remove=True)
+                entity_id = registry.async_get_entity_id("sensor", DOMAIN, sensor.unique_id)
+                if entity_id is not None:
+                    registry.async_remove(entity_id)
+        coordinator.locations = set(self.sensors)
+        sensors = self.create(selected)
+        if sensors:
+            self._add_entities(sensors)
 
 
 class ArpansaSensor(CoordinatorEntity,SensorEntity):
     """Representation of an ARPANSA sensor."""
-    def __init__(self, coordinator, details: Dict[str, str]):
+    def __init__(self, coordinator, entry_id: str, details: Measurement):
         self.details = details
-        self._name = details["friendlyname"]
+        self._entry_id = entry_id
+        self._name = details.friendlyname
         self._state = None
         self._available = True
-        """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator)
+        self._stale = coordinator.data.isStale(self._name)
+        self._unique_id = self._createSensorName()
+        """Pass coordinator to CoordinatorEntity, to be told when this location changes."""
+        super().__init__(coordinator, context=self._name)
 
     @property
     def name(self) -> str | None:
@@ -65,17 +351,12 @@ class ArpansaSensor(CoordinatorEntity,SensorEntity):
     @property
     def unique_id(self) -> str | None:
         """Return the unique ID of the sensor."""
-        return self._createSensorName()
-
-    @property
-    def should_poll(self) -> bool:
-        return True
+        return self._unique_id
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        self.details = self.coordinator.data.getLatest(self._name)
-        if self.details["status"] == "ok":
+        if self.details is not None and self.details.status is Status.OK:
             self._available = True
         else:
             self._available = False
@@ -84,8 +365,7 @@ class ArpansaSensor(CoordinatorEntity,SensorEntity):
     @property
     def native_value(self) -> StateType | date | datetime:
         """Return the current value of the sensor."""
-        self.details = self.coordinator.data.getLatest(self._name)
-        self._state = self.details["index"]
+        self._state = self.details.index
         return self._state
 
     @property
@@ -100,10 +380,10 @@ class ArpansaSensor(CoordinatorEntity,SensorEntity):
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
-        self.details = self.coordinator.data.getLatest(self._name)
         extra_info = {}
-        extra_info["Last Updated (UTC)"] = self.details["utcdatetime"]
-        extra_info["Status"] = self.details["status"]
+        extra_info["Last Updated (UTC)"] = self.details.utcdatetime
+        extra_info["Status"] = self.details.status.value
+        extra_info["Stale"] = self._stale
         return extra_info
 
     @property
@@ -111,10 +391,307 @@ class ArpansaSensor(CoordinatorEntity,SensorEntity):
         """Return the attribution for the sensor data."""
         return ATTRIBUTION
 
-    async def async_update(self):
-        """Retrieve latest state."""
-        await self.coordinator.async_request_refresh()
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Look up this sensor's measurement once per coordinator update."""
+        details = self.coordinator.data.getLatest(self._name)
+        stale = self.coordinator.data.isStale(self._name)
+        if details is self.details and stale == self._stale:
+            return
+        self.details = details
+        self._stale = stale
+        self.async_write_ha_state()
 
     def _createSensorName(self):
         """Format the location name into a sensor name."""
-        return "arpansa_uv_" + inflection.underscore(self.details["name"])
\ No newline at end of file
+        return f"arpansa_uv_{self._entry_id}_{inflection.underscore(self.details.name)}"
+
+class ArpansaUnrecordedSensor(ArpansaSensor):
+    """An ARPANSA sensor that leaves history to long-term statistics.
+
+    Without a state class, the recorder doesn't compile statistics from
+    every reading, and the attributes aren't recorded with each state; the
+    hub writes hourly statistics for the location instead.
+    """
+    _unrecorded_attributes = frozenset({"Last Updated (UTC)", "Status", "Stale"})
+
+    @property
+    def state_class(self) -> SensorStateClass | str | None:
+        """Return no state class."""
+        return None
+
+class ArpansaHistorySensor(ArpansaSensor):
+    """A sensor derived from an ARPANSA location's recent history.
+
+    These are disabled by default.
+    """
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, entry_id: str, details: Measurement, kind: str):
+        self._kind = kind
+        self._set_kind(kind)
+        self._version = None
+        super().__init__(coordinator, entry_id, details)
+        self._history = self._source()
+        self._unique_id = f"{self._unique_id}_{kind}"
+
+    def _set_kind(self, kind: str) -> None:
+        self._label, self._value, self._unit, self._device_class, self._state_class = HISTORY_SENSORS[kind]
+
+    @property
+    def name(self) -> str | None:
+        """Return the name of the entity."""
+        return f"{self._name} {self._label}"
+
+    @property
+    def available(self) -> bool:
+        """Return True if there is any history for the location."""
+        return self._history is not None and self._history.day is not None
+
+    @property
+    def native_value(self) -> StateType | date | datetime:
+        """Return the current value of the sensor."""
+        return self._value(self._history)
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the unit of measurement."""
+        return self._unit
+
+    @property
+    def device_class(self) -> SensorDeviceClass | None:
+        """Return the device class."""
+        return self._device_class
+
+    @property
+    def state_class(self) -> SensorStateClass | str | None:
+        """Return the state class for the entity."""
+        return self._state_class
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        return None
+
+    def _source(self):
+        """Return the history this sensor is derived from."""
+        return self.coordinator.hub.history.get(self._name)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when the location's history has a new sample."""
+        self._history = self._source()
+        if self._history is None or self._history.version == self._version:
+            return
+        self._version = self._history.version
+        self.async_write_ha_state()
+
+
+class ArpansaDoseSensor(ArpansaHistorySensor):
+    """A sensor derived from the UV dose an ARPANSA location has received today.
+
+    These are disabled by default.
+    """
+    def __init__(self, coordinator, entry_id: str, details: Measurement, kind: str, skin_type: int):
+        self._skin_type = skin_type
+        super().__init__(coordinator, entry_id, details, kind)
+
+    def _set_kind(self, kind: str) -> None:
+        self._label, self._unit, self._device_class, self._state_class = DOSE_SENSORS[kind]
+
+    @property
+    def name(self) -> str | None:
+        """Return the name of the entity."""
+        if self._kind == "time_to_burn":
+            return f"{self._name} {self._label} (Skin Type {self._skin_type})"
+        return f"{self._name} {self._label}"
+
+    @property
+    def native_value(self) -> StateType | date | datetime:
+        """Return the current value of the sensor."""
+        if self._kind == "time_to_burn":
+            minutes = time_to_burn(self._history.last_index, self._skin_type)
+            return None if minutes is None else round(minutes)
+        return round(self._history.dose, 3)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        if self._kind == "time_to_burn":
+            return {"Skin Type": self._skin_type}
+        return None
+
+    def _source(self):
+        """Return the dose accumulator this sensor is derived from."""
+        return self.coordinator.hub.doses.get(self._name)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when the location's dose has a new sample."""
+        self._history = self._source()
+        if self._history is None or self._history.last_time == self._version:
+            return
+        self._version = self._history.last_time
+        self.async_write_ha_state()
+
+
+class ArpansaAggregateSensor(CoordinatorEntity,SensorEntity):
+    """A sensor aggregated across the locations of a region.
+
+    The coordinator works out every region's aggregates once per update;
+    these sensors only read their value from the result.
+    """
+    _attr_icon = "mdi:sunglasses"
+    _attr_attribution = ATTRIBUTION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, entry_id: str, region: str, kind: str):
+        self._region = region
+        self._label, self._value = AGGREGATE_SENSORS[kind]
+        self._aggregate = coordinator.aggregates.get(region)
+        self._attr_name = f"{region} {self._label}"
+        region = inflection.parameterize(region, '_')
+        self._attr_unique_id = f"arpansa_uv_{entry_id}_{region}_{kind}"
+        super().__init__(coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Return True if any of the region's locations are reporting."""
+        return self._aggregate is not None and self._aggregate.count > 0
+
+    @property
+    def native_value(self) -> StateType | date | datetime:
+        """Return the current value of the sensor."""
+        return self._value(self._aggregate)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        return {"Locations Reporting": self._aggregate.count if self._aggregate else 0}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when the region's aggregates change."""
+        aggregate = self.coordinator.aggregates.get(self._region)
+        if aggregate == self._aggregate:
+            return
+        self._aggregate = aggregate
+        self.async_write_ha_state()
+
+
+class ArpansaInterpolatedSensor(CoordinatorEntity,SensorEntity):
+    """The UV index at a point, interpolated from the nearest ARPANSA stations.
+
+    The stations and their weights are worked out when the sensor is
+    created, and again only if a tracked zone or device tracker moves.
+    """
+    _attr_icon = "mdi:sunglasses"
+    _attr_attribution = ATTRIBUTION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator,
+        entry_id: str,
+        key: str,
+        label: str,
+        latitude: float,
+        longitude: float,
+        entity_id: str | None = None,
+    ):
+        self._key = key
+        self._tracked = entity_id
+        self._coordinates = (latitude, longitude)
+        self._interpolator = Interpolator(coordinator.hub.stations, latitude, longitude)
+        coordinator.stations[key] = set(self._interpolator.weights)
+        self._value = self._interpolate(coordinator.data)
+        self._attr_name = f"UV Index At {label}"
+        self._attr_unique_id = f"arpansa_uv_{entry_id}_{key}_interpolated"
+        super().__init__(coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Return True if any of the nearby stations are reporting."""
+        return self._value is not None
+
+    @property
+    def native_value(self) -> StateType | date | datetime:
+        """Return the current value of the sensor."""
+        return self._value
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        return {
+            "Stations (km)": {
+                name: round(distance, 1)
+                for name, distance in self._interpolator.distances.items()
+            }
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the tracked entity, if there is one."""
+        await super().async_added_to_hass()
+        self._value = self._interpolate(self.coordinator.data)
+        if self._tracked is not None:
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._tracked], self._async_tracked_moved
+                )
+            )
+
+    @callback
+    def _async_tracked_moved(self, event: Event) -> None:
+        """Work out the stations and weights again if the tracked entity moved."""
+        state = event.data.get("new_state")
+        if state is None or ATTR_LATITUDE not in state.attributes:
+            return
+        coordinates = (state.attributes[ATTR_LATITUDE], state.attributes[ATTR_LONGITUDE])
+        if coordinates == self._coordinates:
+            return
+        self._coordinates = coordinates
+        self._interpolator = Interpolator(self.coordinator.hub.stations, *coordinates)
+        self._value = self._interpolate(self.coordinator.data)
+        self.async_write_ha_state()
+        # Any stations now used that weren't parsed are filled in by the update
+        # that follows.
+        self.coordinator.stations[self._key] = set(self._interpolator.weights)
+        self.hass.async_create_task(self.coordinator.hub.async_refilter())
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop asking for this sensor's stations to be parsed."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.stations.pop(self._key, None)
+
+    def _interpolate(self, snapshot) -> float | None:
+        value = self._interpolator.interpolate(snapshot)
+        return None if value is None else round(value, 2)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when the interpolated value changes."""
+        value = self._interpolate(self.coordinator.data)
+        if value == self._value:
+            return
+        self._value = value
+        self.async_write_ha_state()
+
+
+class ArpansaDiagnosticSensor(CoordinatorEntity,SensorEntity):
+    """A measure of how the integration itself is performing.
+
+    These are disabled by default.
+    """
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_icon = "mdi:speedometer"
+
+    def __init__(self, coordinator, entry_id: str, kind: str):
+        label, self._value, unit, device_class, state_class = DIAGNOSTIC_SENSORS[kind]
+        self._attr_name = f"ARPANSA {label}"
+        self._attr_unique_id = f"arpansa_uv_{entry_id}_{kind}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        super().__init__(coordinator)
+
+    @property
+    def native_value(self) -> StateType | date | datetime:
+        """Return the current value of the sensor."""
+        return self._value(self.coordinator)
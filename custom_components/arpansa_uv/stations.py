@@ -0,0 +1,118 @@
+"""ARPANSA station coordinates and nearest-station lookups."""
+from __future__ import annotations
+
+from array import array
+import math
+
+from .pyarpansa import Snapshot, Status
+
+EARTH_RADIUS = 6371.0  # km
+
+# Approximate latitude and longitude of each ARPANSA station, by location id.
+STATIONS = {
+    "Adelaide": (-34.92, 138.62),
+    "Alice Springs": (-23.80, 133.89),
+    "Brisbane": (-27.45, 153.03),
+    "Canberra": (-35.31, 149.20),
+    "Darwin": (-12.43, 130.89),
+    "Emerald": (-23.53, 148.16),
+    "Gold Coast": (-28.17, 153.51),
+    "Kingston": (-42.99, 147.29),
+    "Melbourne": (-37.73, 145.10),
+    "Newcastle": (-32.90, 151.72),
+    "Perth": (-31.92, 115.96),
+    "Sydney": (-34.04, 151.10),
+    "Townsville": (-19.33, 146.76),
+    "Casey": (-66.28, 110.53),
+    "Davis": (-68.58, 77.97),
+    "Macquarie Island": (-54.50, 158.94),
+    "Mawson": (-67.60, 62.87),
+}
+
+# Interpolation uses up to this many stations within MAX_DISTANCE.
+NEIGHBOURS = 3
+MAX_DISTANCE = 500.0  # km
+POWER = 2
+
+
+def unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    """Return the point on the unit sphere for a latitude and longitude."""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+class StationIndex:
+    """Find the stations nearest to a point.
+
+    Each station is stored as a unit vector, worked out once, so that a
+    lookup is a dot product per station: the closest station has the
+    largest dot product, and its great-circle distance follows from that
+    without any further trigonometry per station.
+    """
+
+    def __init__(self, stations: dict = STATIONS) -> None:
+        """Initialize."""
+        self.names = tuple(stations)
+        vectors = [unit_vector(*stations[name]) for name in self.names]
+        self._x = array("d", (v[0] for v in vectors))
+        self._y = array("d", (v[1] for v in vectors))
+        self._z = array("d", (v[2] for v in vectors))
+
+    def nearest(
+        self, latitude: float, longitude: float, count: int = 1
+    ) -> list[tuple[str, float]]:
+        """Return the nearest stations to a point, with their distance in km."""
+        x, y, z = unit_vector(latitude, longitude)
+        dots = [
+            x * sx + y * sy + z * sz for sx, sy, sz in zip(self._x, self._y, self._z)
+        ]
+        order = sorted(range(len(dots)), key=dots.__getitem__, reverse=True)[:count]
+        return [
+            (self.names[i], EARTH_RADIUS * math.acos(max(-1.0, min(1.0, dots[i]))))
+            for i in order
+        ]
+
+
+class Interpolator:
+    """Inverse-distance-weighted UV index at a point.
+
+    The stations and their weights are worked out once for the point, so
+    each snapshot only costs a weighted sum. Stations that aren't reporting
+    are left out and the remaining weights renormalised.
+    """
+
+    def __init__(
+        self,
+        index: StationIndex,
+        latitude: float,
+        longitude: float,
+        neighbours: int = NEIGHBOURS,
+        max_distance: float = MAX_DISTANCE,
+        power: float = POWER,
+    ) -> None:
+        """Initialize."""
+        nearest = index.nearest(latitude, longitude, neighbours)
+        # Always keep the nearest station, even if it is a long way off.
+        nearest = nearest[:1] + [n for n in nearest[1:] if n[1] <= max_distance]
+        if nearest[0][1] < 1.0:
+            self.weights = {nearest[0][0]: 1.0}
+        else:
+            self.weights = {name: 1 / distance ** power for name, distance in nearest}
+        self.distances = dict(nearest)
+
+    def interpolate(self, snapshot: Snapshot) -> float | None:
+        """Return the interpolated UV index, or None if no station is reporting."""
+        total = weights = 0.0
+        for name, weight in self.weights.items():
+            measurement = snapshot.getLatest(name)
+            if (
+                measurement is None
+                or measurement.status is not Status.OK
+                or measurement.index is None
+            ):
+                continue
+            total += weight * measurement.index
+            weights += weight
+        if not weights:
+            return None
+        return total / weights
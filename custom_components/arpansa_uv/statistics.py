@@ -0,0 +1,130 @@
+"""Hourly UV index statistics per location, for long-term statistics."""
+from __future__ import annotations
+
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .history import History
+from .pyarpansa import Snapshot, Status
+
+HOUR = 3600
+# Completed hours kept per location while they can't be written, e.g.
+# because the recorder isn't loaded.
+MAX_PENDING = 7 * 24
+
+
+def statistic_id(location: str) -> str:
+    """Return the external statistic id for a location."""
+    return f"{DOMAIN}:{slugify(location)}_uv_index"
+
+
+class HourBucket:
+    """Running mean, min and max of a location's samples within an hour."""
+
+    __slots__ = ("start", "last", "count", "total", "min", "max")
+
+    def __init__(self, start: float) -> None:
+        """Initialize."""
+        self.start = start
+        self.last = float("-inf")
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample."""
+        self.last = timestamp
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def summary(self) -> tuple[float, float, float, float]:
+        """Return the hour's (start, mean, min, max)."""
+        return self.start, self.total / self.count, self.min, self.max
+
+    def toCompact(self) -> list:
+        """Return the bucket's state as a JSON-friendly list."""
+        return [self.start, self.last, self.count, self.total, self.min, self.max]
+
+    @classmethod
+    def fromCompact(cls, data: list) -> HourBucket:
+        """Rebuild a bucket from the output of toCompact."""
+        bucket = cls(data[0])
+        _, bucket.last, bucket.count, bucket.total, bucket.min, bucket.max = data
+        return bucket
+
+
+class HourlyStatistics(dict):
+    """The open HourBucket for each location, keyed by location id.
+
+    Adding a sample from a later hour closes the location's bucket and
+    queues its summary in pending, until the caller takes the completed
+    hours to write them out in one batch.
+    """
+
+    def __init__(self, *args) -> None:
+        """Initialize."""
+        super().__init__(*args)
+        self.pending = {}
+        self.exported = {}
+
+    def add(self, snapshot: Snapshot) -> bool:
+        """Add a snapshot's measurements, returning True if any hours are complete."""
+        for m in snapshot:
+            if m.status is Status.OK and m.index is not None and m.utcdatetime is not None:
+                self.add_sample(m.friendlyname, m.utcdatetime.timestamp(), m.index)
+        return bool(self.pending)
+
+    def add_sample(self, location: str, timestamp: float, value: float) -> None:
+        """Add a sample, ignoring any already added or from a written hour."""
+        start = timestamp - timestamp % HOUR
+        if start <= self.exported.get(location, float("-inf")):
+            return
+        bucket = self.get(location)
+        if bucket is not None and timestamp <= bucket.last:
+            return
+        if bucket is None or start > bucket.start:
+            if bucket is not None:
+                hours = self.pending.setdefault(location, [])
+                hours.append(bucket.summary())
+                del hours[:-MAX_PENDING]
+            bucket = self[location] = HourBucket(start)
+        bucket.add(timestamp, value)
+
+    def backfill(self, history: History) -> bool:
+        """Add any samples in the history buffers that haven't been added yet."""
+        for location, location_history in history.items():
+            for timestamp, value in location_history.samples():
+                self.add_sample(location, timestamp, value)
+        return bool(self.pending)
+
+    def take_pending(self) -> dict:
+        """Return and clear the completed hours, as lists of (start, mean, min, max)."""
+        pending, self.pending = self.pending, {}
+        for location, hours in pending.items():
+            self.exported[location] = hours[-1][0]
+        return pending
+
+    def toCompact(self) -> dict:
+        """Return the open buckets, pending hours and export marks for saving."""
+        return {
+            "buckets": {location: bucket.toCompact() for location, bucket in self.items()},
+            "pending": self.pending,
+            "exported": self.exported,
+        }
+
+    @classmethod
+    def fromCompact(cls, data: dict) -> HourlyStatistics:
+        """Rebuild the statistics from the output of toCompact."""
+        statistics = cls(
+            (location, HourBucket.fromCompact(state))
+            for location, state in data.get("buckets", {}).items()
+        )
+        statistics.pending = {
+            location: [tuple(hour) for hour in hours]
+            for location, hours in data.get("pending", {}).items()
+        }
+        statistics.exported = dict(data.get("exported", {}))
+        return statistics
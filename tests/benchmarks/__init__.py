@@ -0,0 +1 @@
+"""Benchmarks for the arpansa_uv integration."""
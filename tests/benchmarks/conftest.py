@@ -0,0 +1,27 @@
+"""Fixtures for the benchmark suite.
+
+The benchmarks need pytest-benchmark and aren't collected by a plain test
+run. Run them with
+
+    pytest tests/benchmarks --benchmark-only --no-cov
+"""
+import pytest
+
+from benchmarks.common import load_feed
+
+from custom_components.arpansa_uv.pyarpansa import Snapshot, parseMeasurements
+
+# The recorded feed has 17 locations; these give 17, 1700 and 5100.
+SCALES = [1, 100, 300]
+
+
+@pytest.fixture(name="feed", params=SCALES, ids=lambda scale: f"{17 * scale}-locations")
+def feed_fixture(request):
+    """Return the recorded feed, scaled up to more locations."""
+    return load_feed(request.param)
+
+
+@pytest.fixture(name="scaled_snapshot")
+def scaled_snapshot_fixture(feed):
+    """Return a Snapshot of the scaled feed."""
+    return Snapshot(parseMeasurements([feed]))
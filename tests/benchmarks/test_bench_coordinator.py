@@ -0,0 +1,62 @@
+"""Benchmark a full coordinator update against a local ARPANSA server."""
+from datetime import timedelta
+from itertools import cycle
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.common import load_feed
+
+from custom_components.arpansa_uv.const import DATA_HUB, DOMAIN
+from custom_components.arpansa_uv.hub import ArpansaFeedHub
+from custom_components.arpansa_uv.pyarpansa import Arpansa
+
+from ..const import MOCK_CONFIG
+
+
+@pytest.mark.parametrize("scale", [1, 100], ids=["17-locations", "1700-locations"])
+def test_coordinator_update(benchmark, hass, event_loop, socket_enabled, scale):
+    """Benchmark fetching, parsing and notifying sensors of a changed feed.
+
+    The server alternates between two versions of the feed so that every
+    update downloads and parses a new document.
+    """
+    feed = load_feed(scale)
+    bodies = cycle([feed, feed.replace(b"<index>", b"<index>1")])
+
+    async def handle(request):
+        return web.Response(body=next(bodies), content_type="application/xml")
+
+    async def setup():
+        app = web.Application()
+        app.router.add_get("/xml/uvvalues.xml", handle)
+        server = TestServer(app, host="127.0.0.1")
+        await server.start_server()
+        session = aiohttp.ClientSession()
+        client = Arpansa(session, url=str(server.make_url("/xml/uvvalues.xml")), retries=0)
+        hass.data.setdefault(DOMAIN, {})[DATA_HUB] = ArpansaFeedHub(hass, client)
+        entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="bench")
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        return server, session, hass.data[DOMAIN][entry.entry_id]
+
+    async def update():
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    server, session, coordinator = event_loop.run_until_complete(setup())
+    # Always fetch, rather than reusing a snapshot from the last half interval.
+    coordinator.scheduler.interval = timedelta(0)
+    try:
+        benchmark(lambda: event_loop.run_until_complete(update()))
+    finally:
+        event_loop.run_until_complete(session.close())
+        event_loop.run_until_complete(server.close())
+    assert coordinator.last_update_success
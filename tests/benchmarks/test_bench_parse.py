@@ -0,0 +1,31 @@
+"""Benchmark parsing the ARPANSA feed."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from custom_components.arpansa_uv.pyarpansa import (
+    CHUNK_SIZE,
+    PARSERS,
+    parseDocument,
+    parseMeasurements,
+)
+
+
+@pytest.mark.parametrize("backend", PARSERS)
+def test_parse(benchmark, feed, backend):
+    """Benchmark parsing a feed delivered in network-sized chunks."""
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    chunks = [feed[offset : offset + CHUNK_SIZE] for offset in range(0, len(feed), CHUNK_SIZE)]
+    measurements = benchmark(parseMeasurements, chunks, backend)
+    assert measurements
+
+
+@pytest.mark.parametrize("selected", [1, 4, 17])
+def test_parse_filtered(benchmark, feed, selected):
+    """Benchmark parsing only a few selected locations out of a feed."""
+    chunks = [feed[offset : offset + CHUNK_SIZE] for offset in range(0, len(feed), CHUNK_SIZE)]
+    names = parseDocument(chunks, locations=set())[1]
+    measurements, skipped = benchmark(parseDocument, chunks, locations=set(names[:selected]))
+    assert len(measurements) == selected
+    assert len(measurements) + len(skipped) == len(names)
@@ -0,0 +1,23 @@
+"""Benchmark reading sensor properties."""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from custom_components.arpansa_uv.sensor import ArpansaSensor
+
+
+def test_sensor_properties(benchmark, scaled_snapshot):
+    """Benchmark the properties read when each location's sensor writes state."""
+    coordinator = SimpleNamespace(data=scaled_snapshot)
+    sensors = [ArpansaSensor(coordinator, "bench", details) for details in scaled_snapshot]
+
+    def read():
+        for sensor in sensors:
+            sensor.available
+            sensor.native_value
+            sensor.extra_state_attributes
+            sensor.unique_id
+
+    benchmark(read)
@@ -0,0 +1,42 @@
+"""Benchmark reading measurements from a Snapshot."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from custom_components.arpansa_uv.aggregate import Aggregator
+from custom_components.arpansa_uv.const import REGIONS
+
+
+def test_get_all_latest(benchmark, scaled_snapshot):
+    """Benchmark getAllLatest."""
+    assert len(benchmark(scaled_snapshot.getAllLatest)) == len(scaled_snapshot)
+
+
+def test_get_latest(benchmark, scaled_snapshot):
+    """Benchmark getLatest for every location."""
+    names = scaled_snapshot.getAllLocations()
+
+    def lookup():
+        for name in names:
+            scaled_snapshot.getLatest(name)
+
+    benchmark(lookup)
+
+
+def test_diff(benchmark, scaled_snapshot):
+    """Benchmark diffing two snapshots where one location changed."""
+    measurements = list(scaled_snapshot)
+    measurements[0] = measurements[0]._replace(index=99.0)
+    changed = type(scaled_snapshot)(measurements)
+    assert len(benchmark(changed.diff, scaled_snapshot)) == 1
+
+
+def test_aggregate(benchmark, scaled_snapshot):
+    """Benchmark working out every region's aggregates."""
+    aggregator = Aggregator(REGIONS)
+
+    def aggregate():
+        scaled_snapshot._columns = None
+        return aggregator.aggregate(scaled_snapshot)
+
+    assert len(benchmark(aggregate)) == len(REGIONS)
@@ -14,10 +14,13 @@
 #
 # See here for more info: https://docs.pytest.org/en/latest/fixture.html (note that
 # pytest includes fixtures OOB which you can use as defined on this page)
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
+from custom_components.arpansa_uv.pyarpansa import Snapshot, parseMeasurements
+
 pytest_plugins = "pytest_homeassistant_custom_component"
 
 
@@ -40,13 +43,28 @@ def skip_notifications_fixture():
         yield
 
 
-# This fixture, when used, will result in calls to async_get_data to return None. To have the call
-# return a value, we would add the `return_value=<VALUE_TO_RETURN>` parameter to the patch call.
+# This fixture returns the recorded feed in tests/fixtures, as ARPANSA serves it.
+@pytest.fixture(name="feed")
+def feed_fixture():
+    """Return the recorded ARPANSA feed."""
+    return (Path(__file__).parent / "fixtures" / "uvvalues.xml").read_bytes()
+
+
+# This fixture returns a Snapshot parsed from the recorded feed.
+@pytest.fixture(name="snapshot")
+def snapshot_fixture(feed):
+    """Return a Snapshot of the recorded ARPANSA feed."""
+    return Snapshot(parseMeasurements([feed]))
+
+
+# This fixture, when used, will result in calls to async_get_data to return the recorded
+# Snapshot above rather than going to the network.
 @pytest.fixture(name="bypass_get_data")
-def bypass_get_data_fixture():
+def bypass_get_data_fixture(snapshot):
     """Skip calls to get data from API."""
     with patch(
-        "custom_components.arpansa_uv.Arpansa.fetchLatestMeasurements"
+        "custom_components.arpansa_uv.Arpansa.fetchLatestMeasurements",
+        return_value=snapshot,
     ):
         yield
 
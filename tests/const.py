@@ -1,5 +1,5 @@
 """Constants for integration_blueprint tests."""
-from custom_components.arpansa_uv.const import CONF_NAME, CONF_LOCATIONS, CONF_POLL_INTERVAL
+from custom_components.arpansa_uv.const import CONF_CUSTOM_REGIONS, CONF_NAME, CONF_LOCATIONS, CONF_NEAREST, CONF_POLL_INTERVAL, CONF_RECORD_SAMPLES, CONF_REGIONS, CONF_SKIN_TYPE, CONF_TRACKED
 
 # Mock config data to be used across multiple tests
-MOCK_CONFIG = {CONF_NAME: "test_arpansa", CONF_LOCATIONS: ['Brisbane','Sydney','Melbourne','Canberra'], CONF_POLL_INTERVAL: 1}
+MOCK_CONFIG = {CONF_NAME: "test_arpansa", CONF_LOCATIONS: ['Brisbane','Sydney','Melbourne','Canberra'], CONF_POLL_INTERVAL: 1, CONF_SKIN_TYPE: 2, CONF_REGIONS: [], CONF_CUSTOM_REGIONS: "", CONF_NEAREST: False, CONF_TRACKED: [], CONF_RECORD_SAMPLES: True}
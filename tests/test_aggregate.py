@@ -0,0 +1,49 @@
+"""Test UV index aggregates across regions."""
+from custom_components.arpansa_uv.aggregate import Aggregator, parse_regions
+from custom_components.arpansa_uv.const import REGIONS
+from custom_components.arpansa_uv.pyarpansa import Snapshot
+
+
+def test_region_aggregates(snapshot):
+    """Test aggregates match a plain walk over each region's measurements."""
+    aggregator = Aggregator(REGIONS)
+    aggregates = aggregator.aggregate(snapshot)
+
+    for region, members in REGIONS.items():
+        values = [
+            m.index
+            for m in snapshot
+            if m.status.value == "ok" and (members is None or m.friendlyname in members)
+        ]
+        aggregate = aggregates[region]
+        assert aggregate.count == len(values)
+        assert aggregate.max == max(values)
+        assert abs(aggregate.mean - sum(values) / len(values)) < 1e-9
+        assert aggregate.above["moderate"] == sum(value >= 3 for value in values)
+        assert aggregate.above["extreme"] == sum(value >= 11 for value in values)
+
+
+def test_region_without_reports(snapshot):
+    """Test a region with no locations reporting has no max or mean."""
+    aggregates = Aggregator({"Nowhere": ("Atlantis",)}).aggregate(snapshot)
+    assert aggregates["Nowhere"].count == 0
+    assert aggregates["Nowhere"].max is None
+    assert aggregates["Nowhere"].above["high"] == 0
+
+
+def test_masks_follow_locations(snapshot):
+    """Test selections are worked out again when the feed's locations change."""
+    aggregator = Aggregator({"Queensland": REGIONS["Queensland"]})
+    full = aggregator.aggregate(snapshot)["Queensland"]
+    brisbane = Snapshot([snapshot.getLatest("Brisbane")])
+    assert aggregator.aggregate(brisbane)["Queensland"].count == 1
+    assert aggregator.aggregate(snapshot)["Queensland"] == full
+
+
+def test_parse_regions():
+    """Test regions are parsed from an option, skipping incomplete groups."""
+    assert parse_regions("East Coast: Brisbane, Sydney; Inland:; : Darwin;Top End:Darwin") == {
+        "East Coast": ("Brisbane", "Sydney"),
+        "Top End": ("Darwin",),
+    }
+    assert parse_regions("") == {}
@@ -0,0 +1,75 @@
+"""Test the standalone ARPANSA collector."""
+import csv
+import gzip
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.arpansa_uv.pyarpansa.cli import SnapshotWriter, collect
+
+PACKAGE_DIR = Path(__file__).parent.parent / "custom_components" / "arpansa_uv"
+
+
+@pytest.fixture(name="feed_url")
+async def feed_url_fixture(socket_enabled, feed):
+    """Serve the recorded feed, then a changed copy, then the same copy again."""
+    bodies = [feed, feed.replace(b"11.2", b"11.4"), feed.replace(b"11.2", b"11.4")]
+
+    async def handle(request):
+        return web.Response(body=bodies.pop(0), content_type="application/xml")
+
+    app = web.Application()
+    app.router.add_get("/xml/uvvalues.xml", handle)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    yield str(server.make_url("/xml/uvvalues.xml"))
+    await server.close()
+
+
+async def test_collect_ndjson_gzip(feed_url, tmp_path):
+    """Test new snapshots are appended to a gzip file, one member each."""
+    path = str(tmp_path / "uv.ndjson.gz")
+    writer = SnapshotWriter("ndjson", path, ["Brisbane"])
+    arpansa = await collect(writer, feed_url, interval=0, count=3)
+
+    assert arpansa.stats["requests"] == 3
+    assert writer.written == 2
+    with gzip.open(path, "rt") as file:
+        records = [json.loads(line) for line in file]
+    assert [r["index"] for r in records] == [11.2, 11.4]
+    assert records[0]["location"] == "Brisbane"
+    assert records[0]["utc"] == "2022-01-14T02:30:00+00:00"
+
+
+async def test_collect_csv(feed_url, tmp_path):
+    """Test appending to an existing CSV file doesn't repeat the header."""
+    path = tmp_path / "uv.csv"
+    await collect(SnapshotWriter("csv", str(path)), feed_url, interval=0, count=1)
+    await collect(SnapshotWriter("csv", str(path)), feed_url, interval=0, count=1)
+
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 2 * 17
+    assert [row["index"] for row in rows if row["location"] == "Brisbane"] == ["11.2", "11.4"]
+
+
+def test_standalone_without_home_assistant():
+    """Test the package runs on its own without importing Home Assistant."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pyarpansa.cli; "
+            "assert not [m for m in sys.modules if m.startswith('homeassistant')]; "
+            "pyarpansa.cli.parseArgs(['--count', '1'])",
+        ],
+        cwd=PACKAGE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
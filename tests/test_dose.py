@@ -0,0 +1,66 @@
+"""Test erythemal dose accumulation."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.arpansa_uv.dose import (
+    MED,
+    SED_PER_INDEX_HOUR,
+    DoseAccumulator,
+    Doses,
+    time_to_burn,
+)
+from custom_components.arpansa_uv.pyarpansa import Measurement, Status
+
+START = datetime(2022, 1, 14, 0, 0, tzinfo=timezone.utc)
+OFFSET = timedelta(hours=10)
+
+
+def sample(minutes, index):
+    """Return a Brisbane measurement the given minutes after START."""
+    utc = START + timedelta(minutes=minutes)
+    return Measurement(
+        "Brisbane", "bri", index, (utc + OFFSET).replace(tzinfo=None), utc, Status.OK
+    )
+
+
+def test_trapezoidal_dose():
+    """Test the dose is integrated between successive samples."""
+    accumulator = DoseAccumulator()
+    accumulator.add(sample(0, 0.0))
+    accumulator.add(sample(10, 10.0))
+    accumulator.add(sample(20, 10.0))
+    assert not accumulator.add(sample(20, 10.0))
+    assert accumulator.dose == pytest.approx((5.0 / 6 + 10.0 / 6) * SED_PER_INDEX_HOUR)
+
+
+def test_gap_and_midnight():
+    """Test gaps are skipped and the dose resets at local midnight."""
+    accumulator = DoseAccumulator()
+    accumulator.add(sample(0, 6.0))
+    accumulator.add(sample(120, 6.0))
+    assert accumulator.dose == 0.0
+
+    accumulator.add(sample(121, 6.0))
+    assert accumulator.dose > 0.0
+    accumulator.add(sample(24 * 60 - OFFSET.total_seconds() / 60, 0.0))
+    assert accumulator.dose == 0.0
+
+
+def test_compact_roundtrip():
+    """Test dose state survives saving and restoring."""
+    doses = Doses()
+    doses["Brisbane"] = DoseAccumulator()
+    doses["Brisbane"].add(sample(0, 4.0))
+    doses["Brisbane"].add(sample(1, 4.0))
+    restored = Doses.fromCompact(doses.toCompact())
+    assert restored.toCompact() == doses.toCompact()
+    assert restored["Brisbane"].add(sample(2, 4.0))
+    assert not restored["Brisbane"].add(sample(1, 4.0))
+
+
+def test_time_to_burn():
+    """Test time to burn for each skin type."""
+    assert time_to_burn(0.0, 2) is None
+    assert time_to_burn(10.0, 1) == pytest.approx(MED[1] / 9.0 * 60)
+    assert time_to_burn(10.0, 6) > time_to_burn(10.0, 1)
@@ -0,0 +1,65 @@
+"""Test per-location UV history."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.arpansa_uv.history import LocationHistory
+from custom_components.arpansa_uv.pyarpansa import Measurement, Status
+
+START = datetime(2022, 1, 14, 0, 0, tzinfo=timezone.utc)
+OFFSET = timedelta(hours=10)
+
+
+def sample(minutes, index):
+    """Return a Brisbane measurement the given minutes after START."""
+    utc = START + timedelta(minutes=minutes)
+    return Measurement(
+        "Brisbane", "bri", index, (utc + OFFSET).replace(tzinfo=None), utc, Status.OK
+    )
+
+
+def test_daily_aggregates():
+    """Test the daily peak and time above the threshold."""
+    history = LocationHistory()
+    for minutes, index in enumerate([1.0, 3.0, 5.0, 4.0, 2.0, 3.5]):
+        assert history.add(sample(minutes, index))
+    assert not history.add(sample(5, 3.5))
+
+    assert history.peak == 5.0
+    assert history.peak_time == START + timedelta(minutes=2)
+    assert history.minutes_above == 3.0
+    assert len(history) == 6
+
+
+def test_gaps_not_counted():
+    """Test time above the threshold isn't counted across a gap in the data."""
+    history = LocationHistory()
+    history.add(sample(0, 5.0))
+    history.add(sample(60, 5.0))
+    history.add(sample(61, 5.0))
+    assert history.minutes_above == 1.0
+
+
+def test_midnight_reset():
+    """Test the daily aggregates restart at local midnight."""
+    history = LocationHistory()
+    history.add(sample(0, 8.0))
+    history.add(sample(1, 8.0))
+    midnight = 24 * 60 - OFFSET.total_seconds() / 60
+    history.add(sample(midnight, 0.5))
+    assert history.peak == 0.5
+    assert history.minutes_above == 0.0
+
+
+def test_rolling_mean_and_wraparound():
+    """Test the rolling mean as old samples leave the window and the buffer."""
+    history = LocationHistory(size=10)
+    for minutes in range(30):
+        history.add(sample(minutes, float(minutes)))
+    # Only the last 10 samples are still buffered, so only they are averaged.
+    assert len(history) == 10
+    assert [index for _, index in history.samples()] == [float(m) for m in range(20, 30)]
+    assert history.mean == sum(range(20, 30)) / 10
+
+    history = LocationHistory()
+    for minutes in range(30):
+        history.add(sample(minutes, float(minutes)))
+    assert history.mean == sum(range(15, 30)) / 15
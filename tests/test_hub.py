@@ -0,0 +1,178 @@
+"""Test the shared ARPANSA feed hub."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant import config_entries
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.arpansa_uv import SCAN_INTERVAL
+from custom_components.arpansa_uv.const import (
+    ARPANSA_URL,
+    CONF_CACHE_TTL,
+    CONF_MIRRORS,
+    CONF_RECORD_SAMPLES,
+    DATA_HUB,
+    DOMAIN,
+)
+from custom_components.arpansa_uv.hub import SAVE_DELAY, STORAGE_KEY
+from custom_components.arpansa_uv.scheduler import MAX_JITTER
+
+from .const import MOCK_CONFIG
+
+
+async def test_entries_share_one_fetch(hass, aioclient_mock, freezer, feed):
+    """Test several entries and a config flow share a single download."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entries = [
+        MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id=f"test{n}")
+        for n in range(3)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert aioclient_mock.call_count == 1
+
+    await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert aioclient_mock.call_count == 1
+
+    freezer.tick(SCAN_INTERVAL + MAX_JITTER + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert aioclient_mock.call_count == 2
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    assert DATA_HUB in hass.data[DOMAIN]
+
+
+async def test_hub_outlives_reload(hass, aioclient_mock, feed):
+    """Test reloading every entry keeps the hub and what it has gathered."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = hass.data[DOMAIN][DATA_HUB]
+    history = hub.history["Brisbane"]
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][DATA_HUB] is hub
+    assert hub.history["Brisbane"] is history
+    assert aioclient_mock.call_count == 1
+
+
+async def test_entries_settings_merged(hass, aioclient_mock, feed):
+    """Test every entry's mirrors are used and flows go by the shortest cache lifetime."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={**MOCK_CONFIG, CONF_MIRRORS: mirror, CONF_CACHE_TTL: ttl},
+            entry_id=f"test{n}",
+        )
+        for n, (mirror, ttl) in enumerate(
+            [("https://one.example/uv.xml", 30), ("https://two.example/uv.xml", 90)]
+        )
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub = hass.data[DOMAIN][DATA_HUB]
+    assert [endpoint.url for endpoint in hub.api.endpoints][1:] == [
+        "https://one.example/uv.xml",
+        "https://two.example/uv.xml",
+    ]
+    assert hub.flow_ttl == timedelta(seconds=30)
+
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    assert [endpoint.url for endpoint in hub.api.endpoints][1:] == [
+        "https://two.example/uv.xml"
+    ]
+    assert hub.flow_ttl == timedelta(seconds=90)
+
+
+async def test_saves_snapshot(hass, aioclient_mock, hass_storage, freezer, feed):
+    """Test fetched snapshots are saved for the next startup."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    freezer.tick(timedelta(seconds=SAVE_DELAY + 1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    hub = hass.data[DOMAIN][DATA_HUB]
+    assert hass_storage[STORAGE_KEY]["data"] == {
+        "snapshot": hub.snapshot.toCompact(),
+        "doses": hub.doses.toCompact(),
+        "statistics": hub.statistics.toCompact(),
+    }
+
+
+async def test_startup_from_saved_snapshot(hass, hass_storage, snapshot, error_on_get_data):
+    """Test entries start from the saved snapshot when ARPANSA is unreachable."""
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": STORAGE_KEY,
+        "data": {"snapshot": snapshot.toCompact()},
+    }
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.brisbane_uv_index")
+    assert state.state == "11.2"
+    assert state.attributes["Stale"] is True
+
+
+@pytest.mark.parametrize("record_samples", [False, True])
+async def test_writes_hourly_statistics(hass, aioclient_mock, freezer, record_samples, feed):
+    """Test a finished hour is written as external statistics for unrecorded sensors.
+
+    Sensors that record every sample get their statistics from the recorder.
+    """
+    hass.config.components.add("recorder")
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**MOCK_CONFIG, CONF_RECORD_SAMPLES: record_samples},
+        entry_id="test",
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(
+        ARPANSA_URL,
+        content=feed.replace(b"2022/01/14 02:30", b"2022/01/14 03:00").replace(b"11.2", b"11.6"),
+    )
+    with patch(
+        "homeassistant.components.recorder.statistics.async_add_external_statistics"
+    ) as add_statistics:
+        freezer.tick(SCAN_INTERVAL + MAX_JITTER + timedelta(seconds=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    written = {call.args[1]["statistic_id"]: call.args[2] for call in add_statistics.mock_calls}
+    if record_samples:
+        assert not written
+        return
+    assert set(written) == {
+        f"{DOMAIN}:{location.lower()}_uv_index" for location in MOCK_CONFIG["locations"]
+    }
+    (hour,) = written[f"{DOMAIN}:brisbane_uv_index"]
+    assert hour["start"].isoformat() == "2022-01-14T02:00:00+00:00"
+    assert hour["mean"] == hour["max"] == 11.2
@@ -0,0 +1,52 @@
+"""Guard against import time regressions in the ARPANSA client."""
+from pathlib import Path
+import subprocess
+import sys
+
+PACKAGE_DIR = Path(__file__).parent.parent / "custom_components" / "arpansa_uv"
+# Cumulative import time budget for the client and whatever it pulls in
+# beyond aiohttp, in microseconds.
+BUDGET = 100000
+OPTIONAL_CHECK = "assert not {'bs4', 'lxml'} & set(sys.modules), 'optional backend imported'"
+
+
+def import_time(code: str, cwd: Path) -> dict:
+    """Run code with -X importtime, returning each module's cumulative microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                # The first entry for a module is where it was actually loaded.
+                timings.setdefault(name.strip(), int(cumulative))
+    return timings
+
+
+def test_import_time():
+    """Test the client imports within budget and without optional backends.
+
+    The client is loaded on its own, as the standalone collector does, so
+    that only it is timed, rather than its parent package and Home Assistant.
+    aiohttp is imported first: the client needs it, and Home Assistant has
+    always loaded it already.
+    """
+    timings = import_time(f"import sys, aiohttp, pyarpansa; {OPTIONAL_CHECK}", PACKAGE_DIR)
+    assert timings["pyarpansa"] < BUDGET
+    assert not [name for name in timings if name.startswith("homeassistant")]
+
+
+def test_integration_skips_optional_backends():
+    """Test importing the integration doesn't load an optional parser backend."""
+    timings = import_time(
+        f"import sys, custom_components.arpansa_uv; {OPTIONAL_CHECK}", PACKAGE_DIR.parent.parent
+    )
+    assert "custom_components.arpansa_uv" in timings
@@ -0,0 +1,29 @@
+"""Test the instrumentation histograms."""
+import pytest
+
+from custom_components.arpansa_uv.pyarpansa.metrics import Histogram
+
+
+def test_histogram_percentiles():
+    """Test percentiles are estimated to within a bucket."""
+    histogram = Histogram()
+    assert histogram.percentile(0.5) is None
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    assert len(histogram) == 100
+    assert histogram.mean == pytest.approx(0.0505)
+    assert histogram.max == 0.1
+    assert histogram.percentile(0.5) == pytest.approx(0.05, rel=0.26)
+    assert histogram.percentile(0.95) == pytest.approx(0.095, rel=0.26)
+    assert histogram.percentile(1.0) == 0.1
+
+
+def test_histogram_out_of_range():
+    """Test values beyond the buckets are still counted."""
+    histogram = Histogram(low=1.0, high=10.0)
+    histogram.record(0.1)
+    histogram.record(1000.0)
+    assert histogram.percentile(0.5) == pytest.approx(1.0)
+    assert histogram.percentile(1.0) == 1000.0
+    assert histogram.summary()["count"] == 2
@@ -0,0 +1,469 @@
+"""Test the ARPANSA API client."""
+import asyncio
+from datetime import datetime, timezone
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import pytest
+
+from custom_components.arpansa_uv.const import ARPANSA_URL
+from custom_components.arpansa_uv.pyarpansa import (
+    ApiError,
+    Arpansa,
+    CircuitBreaker,
+    DocumentError,
+    PARSERS,
+    MeasurementParser,
+    PayloadError,
+    Snapshot,
+    Status,
+    parseDocument,
+)
+
+# The feed the stub servers serve, set by their fixtures.
+FEED_KEY = web.AppKey("feed", bytes)
+
+
+async def ok(request):
+    """Serve the recorded feed."""
+    return web.Response(body=request.app[FEED_KEY], content_type="application/xml")
+
+
+async def slow(request):
+    """Serve the recorded feed after a long delay."""
+    await asyncio.sleep(1)
+    return await ok(request)
+
+
+async def unavailable(request):
+    """Fail with a server error."""
+    return web.Response(status=503)
+
+
+async def missing(request):
+    """Fail with a client error."""
+    return web.Response(status=404)
+
+
+async def truncated(request):
+    """Serve an incomplete document."""
+    feed = request.app[FEED_KEY]
+    return web.Response(body=feed[: len(feed) // 2], content_type="application/xml")
+
+
+async def oversized(request):
+    """Serve a document far bigger than the feed."""
+    feed = request.app[FEED_KEY]
+    padding = b"<!-- " + b"x" * 100000 + b" -->"
+    body = feed.replace(b"<stations>", b"<stations>" + padding)
+    return web.Response(body=body, content_type="application/xml")
+
+
+async def endless(request):
+    """Stream a document that never ends, without a Content-Length."""
+    feed = request.app[FEED_KEY]
+    response = web.StreamResponse()
+    await response.prepare(request)
+    await response.write(feed[: feed.index(b"<location ")])
+    while True:
+        await response.write(b"<!-- " + b"x" * 1000 + b" -->")
+
+
+async def malformed(request):
+    """Stream a document that is broken early on and then never ends."""
+    feed = request.app[FEED_KEY]
+    response = web.StreamResponse()
+    await response.prepare(request)
+    await response.write(feed[: feed.index(b"<location ")] + b"<location></stations>")
+    while True:
+        await response.write(b"<!-- " + b"x" * 1000 + b" -->")
+        await asyncio.sleep(0.01)
+
+
+async def dripping(request):
+    """Serve the recorded feed a few bytes at a time."""
+    feed = request.app[FEED_KEY]
+    response = web.StreamResponse()
+    await response.prepare(request)
+    for offset in range(0, len(feed), 16):
+        await response.write(feed[offset : offset + 16])
+        await asyncio.sleep(0.01)
+    await response.write_eof()
+    return response
+
+
+async def nested(request):
+    """Serve a small but absurdly deeply nested document."""
+    feed = request.app[FEED_KEY]
+    body = feed.replace(b"<index>", b"<a>" * 5000 + b"</a>" * 5000 + b"<index>", 1)
+    return web.Response(body=body, content_type="application/xml")
+
+
+@pytest.fixture(name="stub")
+async def stub_fixture(socket_enabled, feed):
+    """Run a local ARPANSA server that replies with each queued handler in turn."""
+    handlers = []
+
+    async def handle(request):
+        return await handlers.pop(0)(request)
+
+    app = web.Application()
+    app[FEED_KEY] = feed
+    app.router.add_get("/xml/uvvalues.xml", handle)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    async with aiohttp.ClientSession() as session:
+        yield handlers, lambda **kwargs: Arpansa(
+            session, url=str(server.make_url("/xml/uvvalues.xml")), **kwargs
+        )
+    await server.close()
+
+
+@pytest.fixture(name="mirrors")
+async def mirrors_fixture(socket_enabled, feed):
+    """Run local ARPANSA servers that each wait a given delay before replying."""
+    servers = []
+    sessions = []
+
+    async def start(*delays, **kwargs):
+        urls = []
+        for delay in delays:
+            async def handle(request, delay=delay):
+                if delay is None:
+                    return await unavailable(request)
+                await asyncio.sleep(delay)
+                return await ok(request)
+
+            app = web.Application()
+            app[FEED_KEY] = feed
+            app.router.add_get("/xml/uvvalues.xml", handle)
+            server = TestServer(app, host="127.0.0.1")
+            await server.start_server()
+            servers.append(server)
+            urls.append(str(server.make_url("/xml/uvvalues.xml")))
+        session = aiohttp.ClientSession()
+        sessions.append(session)
+        return Arpansa(session, url=urls[0], mirrors=urls[1:], **kwargs)
+
+    yield start
+    for session in sessions:
+        await session.close()
+    for server in servers:
+        await server.close()
+
+
+@pytest.mark.parametrize("backend", PARSERS)
+def test_parser_chunked(backend, feed):
+    """Test that each parser gives the same result however the feed is chunked."""
+    whole = MeasurementParser()
+    expected = whole.feed(feed) + whole.close()
+    assert len(expected) == 17
+
+    chunked = PARSERS[backend]()
+    measurements = []
+    for offset in range(0, len(feed), 7):
+        measurements += chunked.feed(feed[offset : offset + 7])
+    measurements += chunked.close()
+    assert measurements == expected
+
+
+@pytest.mark.parametrize("backend", PARSERS)
+def test_parser_filtered(backend, feed):
+    """Test that only the wanted locations are built, and the rest only listed."""
+    measurements, skipped = parseDocument([feed], backend, locations={"Brisbane", "Darwin"})
+    assert [m.friendlyname for m in measurements] == ["Brisbane", "Darwin"]
+    assert len(skipped) == 15 and "Sydney" in skipped
+
+    snapshot = Snapshot(measurements, skipped=skipped)
+    assert len(snapshot) == 2
+    assert snapshot.getLatest("Sydney") is None
+    assert len(snapshot.getAllLocations()) == 17
+    assert len(snapshot.asStale().getAllLocations()) == 17
+
+
+def test_snapshot_quarantine(snapshot):
+    """Test malformed records keep their last good measurement, and the rest publish."""
+    brisbane = snapshot.getLatest("Brisbane")
+    records = [
+        m._replace(index=None) if m is brisbane
+        else m._replace(status=Status("broken")) if m.friendlyname == "Sydney"
+        else m._replace(index=99.0) if m.friendlyname == "Darwin"
+        else m._replace(index=1.0) if m.friendlyname == "Perth"
+        else m
+        for m in snapshot
+    ]
+
+    checked = Snapshot.fromRecords(records, snapshot)
+    assert checked.quarantined == {"Brisbane", "Sydney", "Darwin"}
+    assert checked.getLatest("Brisbane") is brisbane
+    assert checked.getLatest("Sydney") is snapshot.getLatest("Sydney")
+    assert checked.getLatest("Perth").index == 1.0
+    assert checked.isStale("Brisbane") and not checked.isStale("Perth")
+    assert checked.diff(snapshot) == {"Brisbane", "Sydney", "Darwin", "Perth"}
+
+    # Without an earlier measurement to fall back on, nothing of it is kept.
+    checked = Snapshot.fromRecords(records)
+    darwin = checked.getLatest("Darwin")
+    assert darwin.status is Status.UNKNOWN
+    assert darwin.index is None
+    assert darwin.utcdatetime is None and darwin.localdatetime is None
+    assert len(checked) == len(snapshot)
+
+
+def test_snapshot_compact_roundtrip(snapshot):
+    """Test a snapshot survives conversion to and from its compact form."""
+    restored = Snapshot.fromCompact(snapshot.toCompact(), stale=True)
+    assert restored.getAllLatest() == snapshot.getAllLatest()
+    assert restored.stale
+
+
+def test_snapshot_diff(snapshot):
+    """Test only locations whose records changed are reported as changed."""
+    assert snapshot.diff(snapshot) == set()
+    assert snapshot.diff(None) == set(snapshot.getAllLocations())
+    assert Snapshot.fromCompact(snapshot.toCompact()).diff(snapshot) == set()
+
+    measurements = [m for m in snapshot if m.friendlyname != "Darwin"]
+    measurements[0] = measurements[0]._replace(index=0.0)
+    changed = Snapshot(measurements)
+    assert changed.diff(snapshot) == {measurements[0].friendlyname, "Darwin"}
+
+
+async def test_fetch(hass, aioclient_mock, feed):
+    """Test fetching and querying the latest measurements."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    arpansa = Arpansa(async_get_clientsession(hass))
+    await arpansa.fetchLatestMeasurements()
+
+    assert len(arpansa.getAllLocations()) == 17
+    assert "Brisbane" in arpansa.getAllLocations()
+    brisbane = arpansa.getLatest("Brisbane")
+    assert brisbane.name == "bri"
+    assert brisbane.index == 11.2
+    assert brisbane.status is Status.OK
+    assert brisbane.utcdatetime == datetime(2022, 1, 14, 2, 30, tzinfo=timezone.utc)
+    assert brisbane.localdatetime == datetime(2022, 1, 14, 12, 30)
+    assert arpansa.getLatest("Mawson").status is Status.NOT_IN_SERVICE
+    assert arpansa.getLatest("Nowhere") is None
+    assert arpansa.getAllLatest() == tuple(arpansa.measurements)
+
+
+async def test_filtered_fetch(hass, aioclient_mock, feed):
+    """Test more locations can be parsed from the last document without a fetch."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    arpansa = Arpansa(async_get_clientsession(hass))
+    arpansa.locations = {"Brisbane"}
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert len(snapshot) == 1
+    assert len(snapshot.getAllLocations()) == 17
+
+    # Fewer locations don't need parsing again.
+    arpansa.locations = set()
+    assert await arpansa.refilter() is snapshot
+
+    arpansa.locations = {"Brisbane", "Sydney"}
+    refiltered = await arpansa.refilter()
+    assert refiltered is arpansa.measurements
+    assert refiltered.getLatest("Sydney").index is not None
+    assert aioclient_mock.call_count == 1
+
+    # An unchanged document is parsed again if more locations are wanted.
+    arpansa.locations = None
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert len(snapshot) == 17
+    assert arpansa.stats["unchanged"] == 1
+
+
+async def test_fetch_errors(hass, aioclient_mock, feed):
+    """Test that bad responses raise ApiError."""
+    session = async_get_clientsession(hass)
+    aioclient_mock.get(ARPANSA_URL, status=500)
+    with pytest.raises(ApiError):
+        await Arpansa(session, backoff=0).fetchLatestMeasurements()
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(ARPANSA_URL, content=feed[:-100])
+    with pytest.raises(ApiError):
+        await Arpansa(session, backoff=0).fetchLatestMeasurements()
+
+
+async def test_conditional_fetch(hass, aioclient_mock, feed):
+    """Test unchanged data is neither downloaded nor parsed again."""
+    arpansa = Arpansa(async_get_clientsession(hass))
+    headers = {"ETag": '"abc"', "Last-Modified": "Fri, 14 Jan 2022 02:30:00 GMT"}
+    aioclient_mock.get(ARPANSA_URL, content=feed, headers=headers)
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert aioclient_mock.mock_calls[-1][3] == {}
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(ARPANSA_URL, status=304)
+    assert await arpansa.fetchLatestMeasurements() is snapshot
+    assert aioclient_mock.mock_calls[-1][3] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Fri, 14 Jan 2022 02:30:00 GMT",
+    }
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    assert await arpansa.fetchLatestMeasurements() is snapshot
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(ARPANSA_URL, content=feed.replace(b"11.2", b"11.4"))
+    assert (await arpansa.fetchLatestMeasurements()).getLatest("Brisbane").index == 11.4
+
+    assert arpansa.stats == {
+        "requests": 4,
+        "full": 2,
+        "not_modified": 1,
+        "unchanged": 1,
+    }
+
+
+async def test_retries_transient_failures(stub):
+    """Test slow, failed and truncated responses are retried."""
+    handlers, client = stub
+    handlers += [unavailable, truncated, slow, ok]
+    arpansa = client(timeout=0.5, retries=3, backoff=0.01)
+
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert not snapshot.stale
+    assert len(snapshot) == 17
+    assert arpansa.stats["failures"] == 3
+    assert arpansa.stats["retries"] == 3
+    assert len(arpansa.latencies) == 1
+    assert arpansa.breaker.state == "closed"
+
+
+async def test_client_errors_not_retried(stub):
+    """Test a client error fails straight away."""
+    handlers, client = stub
+    handlers += [missing, ok]
+    arpansa = client(retries=3, backoff=0.01)
+
+    with pytest.raises(ApiError):
+        await arpansa.fetchLatestMeasurements()
+    assert arpansa.stats["requests"] == 1
+
+
+async def test_circuit_breaker(stub):
+    """Test the last good snapshot is served stale during an outage."""
+    handlers, client = stub
+    handlers += [ok, unavailable, unavailable, ok]
+    arpansa = client(retries=0, breaker=CircuitBreaker(failureThreshold=2, resetTimeout=0.2))
+
+    snapshot = await arpansa.fetchLatestMeasurements()
+    stale = await arpansa.fetchLatestMeasurements()
+    assert stale.stale
+    assert stale.getAllLatest() == snapshot.getAllLatest()
+    assert await arpansa.fetchLatestMeasurements() is stale
+    assert arpansa.breaker.state == "open"
+
+    assert await arpansa.fetchLatestMeasurements() is stale
+    assert arpansa.stats["short_circuited"] == 1
+    assert arpansa.stats["requests"] == 3
+
+    await asyncio.sleep(0.2)
+    assert arpansa.breaker.state == "half-open"
+    assert not (await arpansa.fetchLatestMeasurements()).stale
+    assert arpansa.breaker.state == "closed"
+
+
+@pytest.mark.parametrize("handler", [oversized, endless, nested])
+async def test_rejects_hostile_documents(stub, handler, feed):
+    """Test documents too big or complex to accept keep the last snapshot."""
+    handlers, client = stub
+    handlers += [ok, handler]
+    arpansa = client(retries=3, backoff=0.01, maxPayload=len(feed) * 4)
+
+    snapshot = await arpansa.fetchLatestMeasurements()
+    stale = await arpansa.fetchLatestMeasurements()
+    assert stale.stale
+    assert stale.getAllLatest() == snapshot.getAllLatest()
+    assert arpansa.stats["rejected"] == 1
+    assert arpansa.stats["retries"] == 0
+
+
+async def test_slow_drip_times_out(stub):
+    """Test a response trickling in is abandoned at the attempt timeout."""
+    handlers, client = stub
+    handlers += [ok, dripping]
+    arpansa = client(timeout=0.5, retries=0)
+
+    snapshot = await arpansa.fetchLatestMeasurements()
+    stale = await arpansa.fetchLatestMeasurements()
+    assert stale.stale
+    assert stale.getAllLatest() == snapshot.getAllLatest()
+
+
+async def test_parses_as_it_arrives(stub):
+    """Test a broken document is rejected before the rest of it arrives."""
+    handlers, client = stub
+    handlers += [malformed]
+    arpansa = client(timeout=5, retries=0)
+
+    start = time.monotonic()
+    with pytest.raises(DocumentError):
+        await arpansa.fetchLatestMeasurements()
+    assert time.monotonic() - start < 1
+
+
+def test_parse_budget(feed):
+    """Test parsing is abandoned once it runs over its budget."""
+    chunks = [feed[offset : offset + 64] for offset in range(0, len(feed), 64)]
+    with pytest.raises(PayloadError):
+        parseDocument(chunks, budget=0)
+    assert len(parseDocument(chunks, budget=10)[0]) == 17
+
+
+async def test_hedged_request(mirrors):
+    """Test a slow endpoint is hedged with a mirror and the loser cancelled."""
+    arpansa = await mirrors(2, 0, timeout=1, retries=0)
+    primary, mirror = arpansa.endpoints
+
+    start = time.monotonic()
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert time.monotonic() - start < 1
+    assert not snapshot.stale
+    assert arpansa.stats["hedged"] == 1
+    assert primary.stats["cancelled"] == 1
+    assert len(primary.latencies) == 1
+    assert len(mirror.latencies) == 1
+
+
+async def test_hedged_loser_ranked_last(mirrors):
+    """Test an endpoint that lost a hedge is asked after the one that won."""
+    arpansa = await mirrors(2, 0, timeout=1, retries=0)
+    primary, mirror = arpansa.endpoints
+
+    await arpansa.fetchLatestMeasurements()
+    assert arpansa.rankedEndpoints() == [mirror, primary]
+    assert mirror.latencies.percentile(0.5) < primary.latencies.percentile(0.5)
+
+
+async def test_failed_endpoint_falls_back(mirrors):
+    """Test a failing endpoint falls back to a mirror without a retry."""
+    arpansa = await mirrors(None, 0, retries=0)
+
+    snapshot = await arpansa.fetchLatestMeasurements()
+    assert not snapshot.stale
+    assert arpansa.stats["retries"] == 0
+    assert arpansa.stats.get("hedged", 0) == 0
+    assert arpansa.endpoints[0].failures == 1
+    assert arpansa.rankedEndpoints()[0] is arpansa.endpoints[1]
+
+
+async def test_fastest_endpoint_preferred(mirrors):
+    """Test once each endpoint has been heard from, the fastest is asked first."""
+    arpansa = await mirrors(0.2, 0, timeout=1, retries=0)
+    primary, mirror = arpansa.endpoints
+
+    await arpansa.fetchLatestMeasurements()
+    assert arpansa.rankedEndpoints()[0] is mirror
+    await arpansa.fetchLatestMeasurements()
+    assert arpansa.rankedEndpoints()[0] is mirror
+    assert primary.stats["requests"] == 1
+    assert mirror.stats["requests"] == 1
+    assert mirror.latencies.percentile(0.5) < primary.latencies.percentile(0.5)
@@ -0,0 +1,61 @@
+"""Test the adaptive polling schedule."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.arpansa_uv.pyarpansa import Measurement, Snapshot, Status
+from custom_components.arpansa_uv.scheduler import (
+    IDLE_INTERVAL,
+    PUBLISH_DELAY,
+    AdaptiveScheduler,
+)
+
+MINUTE = timedelta(minutes=1)
+LATEST = datetime(2022, 1, 14, 2, 30, tzinfo=timezone.utc)
+
+
+def make_snapshot(index, status=Status.OK, utcdatetime=LATEST):
+    """Return a snapshot of two locations with the given readings."""
+    return Snapshot(
+        Measurement(name, name.lower(), index, None, utcdatetime, status)
+        for name in ("Brisbane", "Sydney")
+    )
+
+
+def test_aligns_to_publication():
+    """Test polls land just after the feed is next expected to publish."""
+    scheduler = AdaptiveScheduler(MINUTE)
+    scheduler.jitter = timedelta(0)
+    now = LATEST + timedelta(seconds=45)
+    assert scheduler.next_interval(make_snapshot(5.0), now) == (
+        LATEST + 2 * MINUTE + PUBLISH_DELAY - now
+    )
+
+    scheduler = AdaptiveScheduler(5 * MINUTE)
+    scheduler.jitter = timedelta(0)
+    assert scheduler.next_interval(make_snapshot(5.0), now) == (
+        LATEST + 6 * MINUTE + PUBLISH_DELAY - now
+    )
+
+
+def test_learns_cadence():
+    """Test the expected publication cadence follows the feed."""
+    scheduler = AdaptiveScheduler(MINUTE)
+    scheduler.next_interval(make_snapshot(5.0), LATEST)
+    later = LATEST + 10 * MINUTE
+    scheduler.next_interval(make_snapshot(5.0, utcdatetime=later), later)
+    assert scheduler.cadence == 10 * MINUTE
+
+
+def test_backs_off_when_idle():
+    """Test polling slows down while there is nothing to measure."""
+    scheduler = AdaptiveScheduler(MINUTE)
+    assert scheduler.next_interval(make_snapshot(0.0), LATEST) >= IDLE_INTERVAL
+    idle = make_snapshot(5.0, status=Status.NOT_IN_SERVICE)
+    assert scheduler.next_interval(idle, LATEST) >= IDLE_INTERVAL
+
+
+def test_stale_or_missing_data():
+    """Test the configured interval is used when there is nothing to align to."""
+    scheduler = AdaptiveScheduler(MINUTE)
+    scheduler.jitter = timedelta(0)
+    assert scheduler.next_interval(None, LATEST) == MINUTE
+    assert scheduler.next_interval(make_snapshot(5.0), LATEST + timedelta(days=1)) == MINUTE
@@ -0,0 +1,288 @@
+"""Test arpansa_uv sensors."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.arpansa_uv import SCAN_INTERVAL
+from custom_components.arpansa_uv.const import (
+    ARPANSA_URL,
+    CONF_CUSTOM_REGIONS,
+    CONF_LOCATIONS,
+    CONF_NEAREST,
+    CONF_POLL_INTERVAL,
+    CONF_RECORD_SAMPLES,
+    CONF_REGIONS,
+    CONF_TRACKED,
+    DOMAIN,
+)
+from custom_components.arpansa_uv.pyarpansa import Snapshot
+from custom_components.arpansa_uv.scheduler import MAX_JITTER
+
+from .const import MOCK_CONFIG
+
+
+async def setup_entry(hass, aioclient_mock, feed, entry_id="test", **overrides):
+    """Set up a config entry against a feed, overriding MOCK_CONFIG as given."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={**MOCK_CONFIG, **overrides}, entry_id=entry_id, version=2
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_sensor_states(hass, aioclient_mock, feed):
+    """Test sensors are created with the latest measurements."""
+    await setup_entry(hass, aioclient_mock, feed)
+
+    state = hass.states.get("sensor.brisbane_uv_index")
+    assert state.state == "11.2"
+    assert state.attributes["Status"] == "ok"
+    assert len(hass.states.async_entity_ids("sensor")) == len(
+        MOCK_CONFIG["locations"]
+    )
+
+
+async def test_one_lookup_per_refresh(hass, aioclient_mock, feed):
+    """Test a coordinator update looks up each changed sensor's measurement once."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    changed = Snapshot(
+        m._replace(index=m.index + 1) if m.index is not None else m
+        for m in coordinator.data
+    )
+
+    with patch.object(
+        Snapshot, "getLatest", autospec=True, side_effect=Snapshot.getLatest
+    ) as getLatest:
+        coordinator.async_set_updated_data(changed)
+        await hass.async_block_till_done()
+
+    assert getLatest.call_count == len(MOCK_CONFIG["locations"])
+
+
+async def test_unchanged_locations_not_written(hass, aioclient_mock, feed):
+    """Test only sensors whose location changed are told about an update."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    written = hass.states.get("sensor.sydney_uv_index").last_updated
+    brisbane = coordinator.data.getLatest("Brisbane")
+    changed = Snapshot(
+        m._replace(index=12.0) if m is brisbane else m for m in coordinator.data
+    )
+
+    coordinator.async_set_updated_data(changed)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.brisbane_uv_index").state == "12.0"
+    assert hass.states.get("sensor.sydney_uv_index").last_updated == written
+    assert coordinator.suppressed == len(MOCK_CONFIG["locations"]) - 1
+
+
+async def test_one_request_per_interval(hass, aioclient_mock, freezer, feed):
+    """Test only the coordinator fetches, once per interval for all sensors."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert aioclient_mock.call_count == 1
+
+    freezer.tick(SCAN_INTERVAL + MAX_JITTER + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == 2
+    assert coordinator.api.stats["requests"] == 2
+
+
+async def test_region_sensors(hass, aioclient_mock, feed):
+    """Test aggregate sensors are created for the chosen and the entry's own regions."""
+    entry = await setup_entry(
+        hass,
+        aioclient_mock,
+        feed,
+        **{CONF_REGIONS: ["Queensland"], CONF_CUSTOM_REGIONS: "East Coast: Brisbane, Sydney"},
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    aggregate = coordinator.aggregates["Queensland"]
+    assert hass.states.get("sensor.queensland_max_uv_index").state == str(aggregate.max)
+    assert hass.states.get(
+        "sensor.queensland_locations_at_extreme_uv_or_above"
+    ).state == str(aggregate.above["extreme"])
+
+    east = coordinator.aggregates["East Coast"]
+    assert east.count == 2
+    assert hass.states.get("sensor.east_coast_max_uv_index").state == str(east.max)
+    registry = er.async_get(hass)
+    assert registry.async_get("sensor.east_coast_max_uv_index").unique_id == (
+        f"arpansa_uv_{entry.entry_id}_east_coast_max"
+    )
+
+
+async def test_nearest_sensors(hass, aioclient_mock, feed):
+    """Test automatic mode follows the nearest locations to home and zones."""
+    hass.config.latitude, hass.config.longitude = -27.47, 153.02
+    hass.states.async_set(
+        "zone.office", "0", {"latitude": -33.87, "longitude": 151.21, "friendly_name": "Office"}
+    )
+    await setup_entry(
+        hass,
+        aioclient_mock,
+        feed,
+        **{CONF_LOCATIONS: [], CONF_NEAREST: True, CONF_TRACKED: ["zone.office"]},
+    )
+
+    assert hass.states.get("sensor.brisbane_uv_index").state == "11.2"
+    assert hass.states.get("sensor.sydney_uv_index") is not None
+    assert hass.states.get("sensor.uv_index_at_home").state == "11.2"
+    assert hass.states.get("sensor.uv_index_at_office") is not None
+
+    # The Office zone moves to Brisbane.
+    hass.states.async_set(
+        "zone.office", "0", {"latitude": -27.45, "longitude": 153.03, "friendly_name": "Office"}
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.uv_index_at_office").state == "11.2"
+
+
+async def test_entries_sensors_distinct(hass, aioclient_mock, feed):
+    """Test two entries following home each get their own sensors."""
+    hass.config.latitude, hass.config.longitude = -27.47, 153.02
+    for entry_id in ("first", "second"):
+        await setup_entry(hass, aioclient_mock, feed, entry_id, **{CONF_NEAREST: True})
+
+    registry = er.async_get(hass)
+    for entity_id, unique_id in (
+        ("sensor.uv_index_at_home", "arpansa_uv_first_home_interpolated"),
+        ("sensor.uv_index_at_home_2", "arpansa_uv_second_home_interpolated"),
+        ("sensor.brisbane_uv_index", "arpansa_uv_first_bri"),
+        ("sensor.brisbane_uv_index_2", "arpansa_uv_second_bri"),
+    ):
+        assert hass.states.get(entity_id).state == "11.2"
+        assert registry.async_get(entity_id).unique_id == unique_id
+
+
+async def test_unique_ids_migrated(hass, aioclient_mock, feed):
+    """Test sensors of entries made before unique IDs were per entry keep their entity IDs."""
+    aioclient_mock.get(ARPANSA_URL, content=feed)
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test", version=1)
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor", DOMAIN, "arpansa_uv_bri", config_entry=entry, suggested_object_id="brisbane_uv"
+    )
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.version == 2
+    assert registry.async_get("sensor.brisbane_uv").unique_id == "arpansa_uv_test_bri"
+    assert hass.states.get("sensor.brisbane_uv").state == "11.2"
+    assert hass.states.get("sensor.brisbane_uv_index") is None
+
+
+async def test_unrecorded_samples(hass, aioclient_mock, feed):
+    """Test sensors leave history to statistics when samples aren't recorded."""
+    await setup_entry(hass, aioclient_mock, feed, **{CONF_RECORD_SAMPLES: False})
+
+    state = hass.states.get("sensor.brisbane_uv_index")
+    assert state.state == "11.2"
+    assert "state_class" not in state.attributes
+
+
+async def test_location_options_applied_in_place(hass, aioclient_mock, feed):
+    """Test changing locations adds and removes only their sensors, offline."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    brisbane = coordinator.location_sensors.sensors["Brisbane"]
+
+    hass.config_entries.async_update_entry(
+        entry,
+        options={**MOCK_CONFIG, CONF_LOCATIONS: ["Brisbane", "Sydney", "Darwin"]},
+    )
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == 1
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert coordinator.location_sensors.sensors["Brisbane"] is brisbane
+    assert coordinator.locations == {"Brisbane", "Sydney", "Darwin"}
+    assert hass.states.get("sensor.darwin_uv_index") is not None
+    assert hass.states.get("sensor.melbourne_uv_index") is None
+    assert hass.states.get("sensor.canberra_uv_index") is None
+    assert len(hass.states.async_entity_ids("sensor")) == 3
+
+
+async def test_interval_option_applied_in_place(hass, aioclient_mock, feed):
+    """Test changing the poll interval retunes the coordinator without a fetch."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    hass.config_entries.async_update_entry(
+        entry, options={**MOCK_CONFIG, CONF_POLL_INTERVAL: 10}
+    )
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == 1
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert coordinator.scheduler.interval == timedelta(minutes=10)
+    assert coordinator.update_interval >= timedelta(minutes=10)
+
+
+async def test_only_selected_locations_parsed(hass, aioclient_mock, freezer, feed):
+    """Test updates only parse the selected locations, and others on demand."""
+    entry = await setup_entry(hass, aioclient_mock, feed)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.api.locations == set(MOCK_CONFIG[CONF_LOCATIONS])
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(ARPANSA_URL, content=feed.replace(b"11.2", b"11.4"))
+    freezer.tick(SCAN_INTERVAL + MAX_JITTER + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert len(coordinator.data) == len(MOCK_CONFIG[CONF_LOCATIONS])
+    assert hass.states.get("sensor.brisbane_uv_index").state == "11.4"
+
+    hass.config_entries.async_update_entry(
+        entry, options={**MOCK_CONFIG, CONF_LOCATIONS: ["Brisbane", "Darwin"]}
+    )
+    await hass.async_block_till_done()
+    assert aioclient_mock.call_count == 1
+    assert hass.states.get("sensor.darwin_uv_index").state not in ("unknown", "unavailable")
+
+
+async def test_malformed_location_quarantined(hass, aioclient_mock, freezer, feed):
+    """Test one malformed location keeps its last value while the rest update."""
+    await setup_entry(hass, aioclient_mock, feed)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(
+        ARPANSA_URL,
+        content=feed.replace(b"11.2", b"n/a").replace(b"<index>11.0<", b"<index>10.5<"),
+    )
+    freezer.tick(SCAN_INTERVAL + MAX_JITTER + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    brisbane = hass.states.get("sensor.brisbane_uv_index")
+    assert brisbane.state == "11.2"
+    assert brisbane.attributes["Stale"] is True
+    sydney = hass.states.get("sensor.sydney_uv_index")
+    assert sydney.state == "10.5"
+    assert sydney.attributes["Stale"] is False
+
+
+async def test_quarantined_value_not_accumulated(hass, aioclient_mock, feed):
+    """Test a malformed first reading never reaches the daily peak or dose."""
+    entry = await setup_entry(
+        hass, aioclient_mock, feed.replace(b"<index>11.2<", b"<index>99<")
+    )
+
+    hub = hass.data[DOMAIN][entry.entry_id].hub
+    assert hass.states.get("sensor.brisbane_uv_index").state == "unavailable"
+    assert hub.history["Brisbane"].peak is None
+    assert hub.doses["Brisbane"].last_index is None
+    assert hub.history["Sydney"].peak is not None
@@ -0,0 +1,36 @@
+"""Test nearest-station lookups and interpolation."""
+import pytest
+
+from custom_components.arpansa_uv.pyarpansa import Snapshot
+from custom_components.arpansa_uv.stations import STATIONS, Interpolator, StationIndex
+
+
+def test_nearest_station():
+    """Test the nearest stations are found in order with their distances."""
+    index = StationIndex()
+    nearest = index.nearest(-27.47, 153.02, 2)
+    assert [name for name, _ in nearest] == ["Brisbane", "Gold Coast"]
+    assert nearest[0][1] < 5
+    # Brisbane to the Gold Coast is about 90 km.
+    assert nearest[1][1] == pytest.approx(90, abs=10)
+
+
+def test_interpolate_at_station(snapshot):
+    """Test a point at a station takes that station's index."""
+    interpolator = Interpolator(StationIndex(), *STATIONS["Brisbane"])
+    assert interpolator.weights == {"Brisbane": 1.0}
+    assert interpolator.interpolate(snapshot) == snapshot.getLatest("Brisbane").index
+
+
+def test_interpolate_between_stations(snapshot):
+    """Test a point between stations is weighted towards the nearer one."""
+    interpolator = Interpolator(StationIndex(), -27.9, 153.3)
+    brisbane = snapshot.getLatest("Brisbane").index
+    gold_coast = snapshot.getLatest("Gold Coast").index
+    value = interpolator.interpolate(snapshot)
+    assert min(brisbane, gold_coast) <= value <= max(brisbane, gold_coast)
+
+    # Stations that aren't reporting are left out.
+    only_brisbane = Snapshot([snapshot.getLatest("Brisbane")])
+    assert interpolator.interpolate(only_brisbane) == brisbane
+    assert interpolator.interpolate(Snapshot([])) is None
@@ -0,0 +1,46 @@
+"""Test hourly UV statistics."""
+from custom_components.arpansa_uv.history import History
+from custom_components.arpansa_uv.statistics import HourlyStatistics, statistic_id
+
+from .test_history import START, sample
+
+HOUR = START.timestamp()
+
+
+def test_hours_complete_on_the_next_hour():
+    """Test an hour's mean, min and max are queued once a later sample arrives."""
+    statistics = HourlyStatistics()
+    for minutes, index in [(0, 2.0), (20, 4.0), (40, 6.0), (40, 9.0)]:
+        statistics.add_sample("Brisbane", HOUR + minutes * 60, index)
+    assert not statistics.pending
+
+    statistics.add_sample("Brisbane", HOUR + 60 * 60, 1.0)
+    assert statistics.take_pending() == {"Brisbane": [(HOUR, 4.0, 2.0, 6.0)]}
+    assert not statistics.pending
+
+    # Samples from an hour already written are ignored.
+    statistics.add_sample("Brisbane", HOUR + 30 * 60, 5.0)
+    assert statistics["Brisbane"].count == 1
+
+
+def test_backfill_and_restore():
+    """Test buffered history is backfilled once and state survives a restart."""
+    history = History()
+    for minutes in range(0, 90, 10):
+        history.add([sample(minutes, 3.0)])
+
+    statistics = HourlyStatistics()
+    assert statistics.backfill(history)
+    restored = HourlyStatistics.fromCompact(statistics.toCompact())
+    assert restored.take_pending() == {"Brisbane": [(HOUR, 3.0, 3.0, 3.0)]}
+    assert restored["Brisbane"].count == 3
+
+    # Backfilling again doesn't count the same samples twice.
+    restored.backfill(history)
+    assert restored["Brisbane"].count == 3
+    assert not restored.pending
+
+
+def test_statistic_id():
+    """Test statistic ids are valid external statistic ids."""
+    assert statistic_id("Alice Springs") == "arpansa_uv:alice_springs_uv_index"